@@ -1,18 +1,65 @@
 import os
-import tempfile
+import json
 import shutil
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from contextlib import asynccontextmanager
+from typing import List
+from dotenv import load_dotenv
+
+# Load .env once, before the modules below read their settings at import time
+load_dotenv()
+
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from extractor import extract_text
-from summarizer import summarize_with_snowflake, ask_with_snowflake
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from extractor import SUPPORTED_EXTENSIONS, split_text_sections
+from ingest import MaxUploadSizeMiddleware, save_upload, iter_file_sections
+from summarizer import ask_with_snowflake_async, stream_answer
+from long_summary import LONG_DOC_TOKENS, summarize_document, stream_document
+from batch import BATCH_MAX_ITEMS, summarize_batch
+from retrieval import index_stats
+from search_client import init_search_client, close_search_client, get_search_client
+from summary_cache import init_cache, close_cache, get_cache
+from snowflake_pool import init_pool, close_pool, get_pool
+from concurrency import (
+    start_executors, shutdown_executors, limiter_stats,
+)
+from http_client import start_http_client, close_http_client
+from metrics import (
+    CallbackMetric, MetricsMiddleware, observe_stage, render, request_elapsed,
+    start_profiler, stop_profiler,
+)
 from voice_api import router as voice_router
+from warmup import get_warmup, start_warmup, stop_warmup
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Per-worker shared resources, reused across requests
+    init_pool()
+    init_cache()
+    start_executors()
+    await start_http_client()
+    init_search_client()
+    start_profiler()
+    # Runs in the background; /api/ready reports 503 until it finishes
+    start_warmup()
+    yield
+    await stop_warmup()
+    stop_profiler()
+    close_search_client()
+    await close_http_client()
+    shutdown_executors()
+    close_cache()
+    close_pool()
 
 
-app = FastAPI(title="HealthSnap Summarizer API")
+app = FastAPI(title="HealthSnap Summarizer API", lifespan=lifespan)
 
 app.include_router(voice_router)
 
+# Refuse oversized uploads before they are read into the worker
+app.add_middleware(MaxUploadSizeMiddleware)
+
 # Allow your React front-end to call these endpoints
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +68,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so request latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 @app.post("/api/summarize-text")
 async def summarize_text(payload: dict):
     text = payload.get("note")
@@ -28,7 +78,7 @@ async def summarize_text(payload: dict):
     if not text:
         raise HTTPException(status_code=400, detail="No text provided")
     try:
-        summary = summarize_with_snowflake(text, lang)
+        summary = await summarize_document(split_text_sections(text), lang)
         return {"summary": summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -36,14 +86,15 @@ async def summarize_text(payload: dict):
 
 @app.post("/api/summarize-file")
 async def summarize_file(file: UploadFile = File(...), lang: str = "English"):
-    suffix = os.path.splitext(file.filename)[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp_path = tmp.name
-        tmp.write(await file.read())
+    suffix = os.path.splitext(file.filename or "")[1]
+    if suffix.lower() not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+    # The multipart body has been received and parsed by the time we get here.
+    observe_stage("upload.receive", request_elapsed())
+    tmp_path = await save_upload(file)
 
     try:
-        text = extract_text(tmp_path)
-        summary = summarize_with_snowflake(text, lang)
+        summary = await summarize_document(iter_file_sections(tmp_path, LONG_DOC_TOKENS), lang)
         return {"summary": summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -54,6 +105,40 @@ async def summarize_file(file: UploadFile = File(...), lang: str = "English"):
             pass
 
 
+@app.post("/api/summarize-batch")
+async def summarize_batch_endpoint(
+    files: List[UploadFile] = File([]),
+    texts: List[str] = Form([]),
+    lang: str = "English",
+):
+    if not files and not texts:
+        raise HTTPException(status_code=400, detail="No files or texts provided")
+    if len(files) + len(texts) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    for file in files:
+        suffix = os.path.splitext(file.filename or "")[1]
+        if suffix.lower() not in SUPPORTED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+
+    observe_stage("upload.receive", request_elapsed())
+    # Uploads are copied out before responding; the stream outlives the request body.
+    items = []
+    try:
+        for file in files:
+            items.append((file.filename, ("file", await save_upload(file))))
+    except BaseException:
+        for _, (_, path) in items:
+            os.remove(path)
+        raise
+    items.extend((f"text-{i + 1}", ("text", text)) for i, text in enumerate(texts))
+
+    async def results():
+        async for result in summarize_batch(items, lang):
+            yield "result", result
+
+    return _event_stream(results())
+
+
 @app.post("/api/ask")
 async def ask_question(request: Request):
     data = await request.json()
@@ -64,12 +149,106 @@ async def ask_question(request: Request):
         raise HTTPException(status_code=400, detail="Missing note or question")
 
     try:
-        answer = ask_with_snowflake(note, question)
+        answer = await ask_with_snowflake_async(note, question)
         return {"answer": answer}
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail="Failed to answer the question")
-    
+
+
+def _event_stream(events):
+    """
+    Encode (event, data) pairs as Server-Sent Events, ending with "done".
+    Text data is sent as {"text": ...}; dicts are sent as they are.
+    """
+    async def encode():
+        async for event, data in events:
+            payload = data if isinstance(data, dict) else {"text": data}
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        encode(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/summarize-text/stream")
+async def summarize_text_stream(payload: dict):
+    text = payload.get("note")
+    lang = payload.get("lang", "English")
+    if not text:
+        raise HTTPException(status_code=400, detail="No text provided")
+    return _event_stream(stream_document(split_text_sections(text), lang))
+
+
+@app.post("/api/ask/stream")
+async def ask_question_stream(request: Request):
+    data = await request.json()
+    note = data.get("note", "")
+    question = data.get("question", "")
+
+    if not note or not question:
+        raise HTTPException(status_code=400, detail="Missing note or question")
+
+    return _event_stream(stream_answer(note, question))
+
+
+@app.get("/api/pool-stats")
+async def pool_stats():
+    return {
+        "snowflake_pool": get_pool().stats(),
+        "limits": limiter_stats(),
+        "summary_cache": get_cache().stats(),
+        "retrieval_index": index_stats(),
+        "serpapi": get_search_client().stats(),
+    }
+
+
+@app.get("/api/ready")
+async def ready():
+    status = get_warmup().status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _cache_lookups() -> dict:
+    summary = get_cache().stats()
+    search = get_search_client().stats()["cache"]
+    index = index_stats()
+    values = {}
+    for name, stats in (("summary", summary), ("serpapi", search)):
+        values[(name, "memory_hit")] = stats["memory_hits"]
+        values[(name, "disk_hit")] = stats["disk_hits"]
+        values[(name, "coalesced")] = stats["coalesced"]
+        values[(name, "miss")] = stats["misses"]
+    values[("retrieval_index", "memory_hit")] = index["hits"]
+    values[("retrieval_index", "miss")] = index["misses"]
+    return values
+
+
+CallbackMetric(
+    "medihelper_cache_lookups_total", "counter", "Cache lookups by cache and result.",
+    _cache_lookups, ("cache", "result"),
+)
+CallbackMetric(
+    "medihelper_snowflake_connections", "gauge", "Pooled Snowflake connections by state.",
+    lambda: {(state,): get_pool().stats()[state] for state in ("idle", "in_use")}, ("state",),
+)
+CallbackMetric(
+    "medihelper_backend_in_flight", "gauge", "In-flight calls per backend limiter.",
+    lambda: {(name,): stats["in_flight"] for name, stats in limiter_stats().items()}, ("backend",),
+)
+CallbackMetric(
+    "medihelper_serpapi_requests_total", "counter", "Requests sent to SerpAPI, retries included.",
+    lambda: get_search_client().stats()["requests"],
+)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,168 @@
+import asyncio
+import os
+
+from chunking import estimate_tokens
+from concurrency import env_int, run_extraction, run_snowflake
+from cortex import complete_many
+from extractor import extract_text, split_text_sections
+from long_summary import LONG_DOC_TOKENS, summarize_document
+from metrics import batch_queries
+from summarizer import (
+    NO_SUMMARY, PROMPT_VERSION, SUMMARY_ERROR, SUMMARY_MODEL,
+    build_multilingual_prompt, clean_summary, is_cacheable_summary,
+)
+from summary_cache import get_cache, make_key
+
+BATCH_MAX_ITEMS = env_int("BATCH_MAX_ITEMS", 50)
+# Prompts per Cortex query, and how long to wait for a query to fill up.
+BATCH_QUERY_SIZE = env_int("BATCH_QUERY_SIZE", 8)
+BATCH_WINDOW_MS = env_int("BATCH_WINDOW_MS", 50)
+
+
+class BatchClosed(Exception):
+    """Raised for prompts still waiting when their batch is shut down."""
+
+
+class PromptBatcher:
+    """
+    Collects prompts submitted concurrently and sends them to Cortex as one
+    multi-row query once `max_size` are waiting or `window` seconds have
+    passed since the first one arrived.
+    """
+
+    def __init__(self, max_size: int = BATCH_QUERY_SIZE, window: float = BATCH_WINDOW_MS / 1000):
+        self.max_size = max_size
+        self.window = window
+        self._pending = []  # (prompt, future)
+        self._timer = None
+        self._tasks = set()  # queries in flight
+        self._closed = False
+
+    async def submit(self, prompt: str):
+        if self._closed:
+            raise BatchClosed("Batch was cancelled")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            batch_queries.inc()
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list) -> None:
+        try:
+            completions = await run_snowflake(complete_many, [p for p, _ in batch], SUMMARY_MODEL)
+        except asyncio.CancelledError:
+            _fail(batch, BatchClosed("Batch was cancelled"))
+            raise
+        except Exception as e:
+            _fail(batch, e)
+            return
+        for (_, future), completion in zip(batch, completions):
+            if not future.done():
+                future.set_result(completion)
+
+    async def close(self) -> None:
+        """
+        Cancel the queries still in flight and fail every prompt that has not
+        been answered, e.g. when the batch request is cancelled.
+        """
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        _fail(batch, BatchClosed("Batch was cancelled"))
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _fail(batch: list, error: Exception) -> None:
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+async def _summarize_batched(batcher: PromptBatcher, text: str, target_lang: str) -> str:
+    try:
+        raw = await batcher.submit(build_multilingual_prompt(text, target_lang))
+    except BatchClosed:
+        # Not an answer: another batch waiting on this note must compute it
+        # itself rather than share the failure (see get_or_compute()).
+        return None
+    except Exception as e:
+        print(f"Error during batch summarization: {e}")
+        return SUMMARY_ERROR
+    if raw is None:
+        return SUMMARY_ERROR
+    return clean_summary(raw or NO_SUMMARY).strip()
+
+
+async def _summarize_item(index: int, name: str, source, target_lang: str, batcher: PromptBatcher) -> dict:
+    result = {"index": index, "name": name}
+    try:
+        if source[0] == "file":
+            text = await run_extraction(extract_text, source[1])
+        else:
+            text = source[1]
+        if not text.strip():
+            return {**result, "status": "error", "error": "No text found"}
+
+        if estimate_tokens(text) > LONG_DOC_TOKENS:
+            summary = await summarize_document(split_text_sections(text), target_lang)
+        else:
+            key = make_key(text, target_lang, PROMPT_VERSION, SUMMARY_MODEL)
+            summary = await get_cache().get_or_compute(
+                key,
+                lambda: _summarize_batched(batcher, text, target_lang),
+                cacheable=is_cacheable_summary,
+            )
+    except Exception as e:
+        return {**result, "status": "error", "error": str(e)}
+
+    if summary is None:
+        return {**result, "status": "error", "error": "Batch was cancelled"}
+    if summary == SUMMARY_ERROR:
+        return {**result, "status": "error", "error": summary}
+    return {**result, "status": "ok", "summary": summary}
+
+
+async def summarize_batch(items: list, target_lang: str = "English"):
+    """
+    Summarize many notes at once, yielding one result dict per item as soon
+    as it is ready. `items` are (name, ("file", path) | ("text", text)).
+    Files are extracted in parallel on the extraction pool, and short notes
+    share multi-row Cortex queries. Temp files named in `items` are removed
+    when the batch finishes.
+    """
+    batcher = PromptBatcher()
+    tasks = [
+        asyncio.ensure_future(_summarize_item(i, name, source, target_lang, batcher))
+        for i, (name, source) in enumerate(items)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await batcher.close()
+        for _, source in items:
+            if source[0] == "file":
+                try:
+                    os.remove(source[1])
+                except OSError:
+                    pass
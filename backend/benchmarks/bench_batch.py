@@ -0,0 +1,106 @@
+"""
+Throughput of /api/summarize-batch versus one /api/summarize-file call per note.
+
+Both paths upload the same distinct TXT notes to a fake Snowflake connector
+that costs STUB_DELAY seconds per query plus ROW_DELAY for each extra row of
+a multi-row query. The sequential path is what the frontend would do today;
+the batch path extracts files in parallel and sends short notes to Cortex
+several rows per query.
+
+Run from backend/:  python -m benchmarks.bench_batch [--items 5,20,50]
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+# The app is started against stubs; its warm-up would try real Snowflake.
+os.environ.setdefault("STARTUP_WARMUP", "none")
+
+import httpx
+import uvicorn
+
+from benchmarks.stubs import FakeConnection
+
+NOTE = "Visit {i}: pt with productive cough x5 days, T 38.2C. Dx acute bronchitis. Rx amoxicillin 500mg TID."
+
+
+def _start_app(port: int) -> uvicorn.Server:
+    from app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _files(run: str, count: int) -> list:
+    # Distinct text per run keeps the summary cache out of the picture.
+    return [
+        ("files", (f"note{i}.txt", NOTE.format(i=f"{run}-{i}").encode()))
+        for i in range(count)
+    ]
+
+
+async def _sequential(client: httpx.AsyncClient, files: list) -> int:
+    ok = 0
+    for file in files:
+        res = await client.post("/api/summarize-file", files={"file": file[1]})
+        ok += res.status_code == 200
+    return ok
+
+
+async def _batch(client: httpx.AsyncClient, files: list) -> int:
+    ok = 0
+    async with client.stream("POST", "/api/summarize-batch", files=files) as res:
+        async for line in res.aiter_lines():
+            ok += line.startswith("data:") and '"status": "ok"' in line
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", default="5,20,50")
+    parser.add_argument("--stub-delay", type=float, default=0.5, help="seconds per Cortex query")
+    parser.add_argument("--row-delay", type=float, default=0.05, help="extra seconds per batched row")
+    args = parser.parse_args()
+
+    server = _start_app(port=8768)
+
+    from snowflake_pool import ConnectionPool, init_pool
+    connections = []
+
+    def connect():
+        conn = FakeConnection(args.stub_delay, row_delay=args.row_delay)
+        connections.append(conn)
+        return conn
+
+    init_pool(ConnectionPool(connect=connect))
+
+    def queries() -> int:
+        return sum(conn.queries for conn in connections)
+
+    async def run():
+        rows = []
+        async with httpx.AsyncClient(base_url="http://127.0.0.1:8768", timeout=300) as client:
+            for count in (int(n) for n in args.items.split(",")):
+                for label, fn in (("sequential", _sequential), ("batch", _batch)):
+                    before = queries()
+                    start = time.perf_counter()
+                    ok = await fn(client, _files(f"{label}-{count}", count))
+                    elapsed = time.perf_counter() - start
+                    rows.append((count, label, ok, elapsed, queries() - before))
+        return rows
+
+    rows = asyncio.run(run())
+    print(f"{'items':>5} {'mode':<11} {'ok':>4} {'seconds':>8} {'items/s':>8} {'queries':>8}")
+    for count, label, ok, elapsed, used in rows:
+        print(f"{count:>5} {label:<11} {ok:>4} {elapsed:>8.2f} {count / elapsed:>8.1f} {used:>8}")
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Load benchmark for the request path: p50/p99 latency as concurrent users grow.
+
+Snowflake is replaced by a fake connector that blocks for SNOWFLAKE_DELAY
+seconds per query, and SerpAPI by a local stub server. Every /api/ask answer
+is vague, so each request also exercises the SerpAPI fallback. A cheap probe
+endpoint is timed alongside to show the event loop stays responsive.
+
+Run from backend/:  python -m benchmarks.bench_concurrency [--users 1,10,25,50]
+
+The client, the app and the stubs share one process, so on small machines the
+highest user counts measure the harness's own CPU ceiling rather than the app.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import os
+import threading
+import time
+
+
+os.environ.setdefault("SNOWFLAKE_MAX_CONCURRENCY", "128")
+os.environ.setdefault("SNOWFLAKE_POOL_SIZE", "128")
+os.environ.setdefault("SERPAPI_MAX_CONCURRENCY", "128")
+os.environ.setdefault("SERPAPI_RATE_PER_MINUTE", "1000000")
+# The app is started against stubs; its warm-up would try real Snowflake.
+os.environ.setdefault("STARTUP_WARMUP", "none")
+
+import httpx
+import uvicorn
+
+from benchmarks.stubs import FakeConnection, StubServer, percentile
+
+
+def _start_app(port: int) -> uvicorn.Server:
+    from app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+_questions = itertools.count()
+
+
+async def _user(client: httpx.AsyncClient, latencies: list, requests: int):
+    for _ in range(requests):
+        # A distinct question per request so the SerpAPI cache does not absorb the load.
+        question = f"Can I take ibuprofen with drug {next(_questions)}?"
+        start = time.perf_counter()
+        res = await client.post("/api/ask", json={"note": "BP 120/80.", "question": question})
+        res.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def _probe(client: httpx.AsyncClient, latencies: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/pool-stats")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def _run(base_url: str, users: int, requests: int):
+    ask_latencies, probe_latencies = [], []
+    limits = httpx.Limits(max_connections=users + 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, probe_latencies, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(_user(client, ask_latencies, requests) for _ in range(users)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+    return ask_latencies, probe_latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", default="1,10,25,50", help="comma-separated concurrent user counts")
+    parser.add_argument("--requests", type=int, default=5, help="requests per user")
+    parser.add_argument("--snowflake-delay", type=float, default=0.5, help="seconds per fake Cortex query")
+    parser.add_argument("--serpapi-delay", type=float, default=0.2, help="seconds per stub SerpAPI response")
+    args = parser.parse_args()
+
+    with StubServer({"answer_box": {"snippet": "Ask your pharmacist."}}, delay=args.serpapi_delay) as serpapi:
+        os.environ["SERPAPI_URL"] = serpapi.url + "/search"
+        server = _start_app(port=8765)
+        from snowflake_pool import ConnectionPool, init_pool
+        init_pool(ConnectionPool(
+            connect=lambda: FakeConnection(args.snowflake_delay, reply="I'm not sure based on the summary."),
+            max_size=int(os.environ["SNOWFLAKE_POOL_SIZE"]),
+        ))
+
+        print(f"{'users':>5} {'req/s':>8} {'ask p50':>9} {'ask p99':>9} {'probe p99':>10}")
+        for users in (int(n) for n in args.users.split(",")):
+            with contextlib.redirect_stdout(io.StringIO()):
+                ask, probe, elapsed = asyncio.run(_run("http://127.0.0.1:8765", users, args.requests))
+            print(
+                f"{users:>5} {len(ask) / elapsed:>8.1f} "
+                f"{percentile(ask, 50) * 1000:>7.1f}ms {percentile(ask, 99) * 1000:>7.1f}ms "
+                f"{percentile(probe, 99) * 1000:>8.1f}ms"
+            )
+
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
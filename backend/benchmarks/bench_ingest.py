@@ -0,0 +1,105 @@
+"""
+Peak RSS and throughput of file ingestion for synthetic 1, 50 and 500 page PDFs.
+
+"buffered" is the old path: read the whole upload into memory, then join
+every page's text into one string. "streaming" copies the upload to disk in
+fixed-size chunks and walks the pages one at a time with iter_text.
+"sections" is what /api/summarize-file does now: streamed copy, then page
+batches through iter_file_sections, which also detects headings once the
+record is longer than LONG_DOC_TOKENS.
+Each case runs in a fresh subprocess so ru_maxrss is the peak for that case.
+
+Run from backend/:  python -m benchmarks.bench_ingest [--pages 1,5,50,500]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+LINE = "Pt seen for f/u of HTN and T2DM. BP 142/88, A1c 7.9%. Continue metformin 500mg BID."
+
+
+def make_pdf(path: str, pages: int) -> None:
+    import fitz
+
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"VISIT NOTE {number + 1}", fontsize=16)
+        for row in range(48):
+            page.insert_text((72, 90 + row * 14), LINE, fontsize=9)
+    doc.save(path)
+
+
+def run_case(mode: str, path: str) -> dict:
+    import asyncio
+
+    from extractor import _extract_pdf, iter_text, pdf_page_count
+    from ingest import UPLOAD_CHUNK_SIZE, iter_file_sections
+    from long_summary import LONG_DOC_TOKENS
+
+    async def sections(path):
+        return sum([len(text) async for _, text in iter_file_sections(path, LONG_DOC_TOKENS)])
+
+    start = time.perf_counter()
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        with open(path, "rb") as upload:
+            if mode == "buffered":
+                tmp.write(upload.read())
+            else:
+                shutil.copyfileobj(upload, tmp, UPLOAD_CHUNK_SIZE)
+        tmp.flush()
+
+        chars = 0
+        pages = pdf_page_count(tmp.name)
+        if mode == "buffered":
+            chars = len(_extract_pdf(tmp.name))
+        elif mode == "streaming":
+            for text in iter_text(tmp.name):
+                chars += len(text)
+        else:
+            chars = asyncio.run(sections(tmp.name))
+    elapsed = time.perf_counter() - start
+    return {
+        "pages": pages,
+        "chars": chars,
+        "seconds": elapsed,
+        # Linux reports kilobytes
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", default="1,5,50,500")
+    parser.add_argument("--case", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(*args.case)))
+        return
+
+    print(f"{'pages':>5} {'mode':<10} {'peak RSS':>10} {'pages/s':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for pages in (int(n) for n in args.pages.split(",")):
+            path = os.path.join(workdir, f"record_{pages}.pdf")
+            make_pdf(path, pages)
+            for mode in ("buffered", "streaming", "sections"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_ingest", "--case", mode, path],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                print(
+                    f"{pages:>5} {mode:<10} {result['peak_rss_mb']:>8.1f}MB "
+                    f"{result['pages'] / result['seconds']:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Overhead of the metrics layer: cost per span, per histogram observation, per
+request through MetricsMiddleware, and time to render /metrics.
+
+Run from backend/:  python -m benchmarks.bench_metrics [--iterations 200000]
+"""
+import argparse
+import asyncio
+import time
+
+
+def _per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    from metrics import MetricsMiddleware, render, span, stage_seconds
+
+    def empty():
+        pass
+
+    def with_span():
+        with span("bench.noop"):
+            pass
+
+    baseline = _per_call(empty, args.iterations)
+    span_cost = _per_call(with_span, args.iterations) - baseline
+    observe_cost = _per_call(lambda: stage_seconds.observe(0.123, stage="bench.observe"), args.iterations) - baseline
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+    wrapped = MetricsMiddleware(endpoint)
+
+    async def requests(app, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            await app(dict(scope), receive, send)
+        return (time.perf_counter() - start) / n
+
+    n = args.iterations // 10
+    plain = asyncio.run(requests(endpoint, n))
+    middleware_cost = asyncio.run(requests(wrapped, n)) - plain
+
+    for i in range(50):
+        stage_seconds.observe(0.1, stage=f"bench.stage{i}")
+    start = time.perf_counter()
+    body = render()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    print(f"span():              {span_cost * 1e6:6.2f} us")
+    print(f"Histogram.observe(): {observe_cost * 1e6:6.2f} us")
+    print(f"MetricsMiddleware:   {middleware_cost * 1e6:6.2f} us per request")
+    print(f"render():            {render_ms:6.2f} ms for {body.count(chr(10))} lines")
+
+
+if __name__ == "__main__":
+    main()
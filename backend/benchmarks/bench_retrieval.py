@@ -0,0 +1,103 @@
+"""
+Prompt size and latency of /api/ask with passage retrieval versus the whole note.
+
+A synthetic discharge record with many sections is asked a series of
+follow-up questions. "full" sends the entire record with every question, as
+the ask path used to; "retrieval" sends only the top-k BM25 passages. The
+fake connector charges STUB_DELAY per query plus KCHAR_DELAY per 1000
+characters of prompt, standing in for the model's prefill time. "found" says
+whether the passage holding the answer made it into the prompt.
+
+Run from backend/:  python -m benchmarks.bench_retrieval [--sections 40]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.stubs import FakeConnection, percentile
+
+FILLER = (
+    "Vitals stable overnight. Patient ambulating with assistance, tolerating diet. "
+    "No acute events reported by nursing. Pain controlled on current regimen. "
+)
+
+FACTS = [
+    ("ALLERGIES", "Allergic to penicillin (hives) and sulfa drugs.",
+     "Which drugs am I allergic to?", "penicillin"),
+    ("DISCHARGE MEDICATIONS", "Metoprolol 25mg twice daily, atorvastatin 40mg nightly.",
+     "What dose of metoprolol should I take?", "25mg"),
+    ("FOLLOW-UP", "Cardiology clinic in 2 weeks with repeat echocardiogram.",
+     "When is my cardiology follow-up?", "2 weeks"),
+    ("LABS", "Troponin peaked at 2.4 ng/mL, LDL 162 mg/dL, A1c 6.1%.",
+     "What was my troponin level?", "2.4"),
+    ("DIET", "Low sodium diet under 2 grams per day, fluid restriction 1.5 litres.",
+     "How much sodium can I have in my diet?", "2 grams"),
+]
+
+
+def make_record(sections: int) -> str:
+    parts = []
+    for i in range(sections):
+        if i % (sections // len(FACTS)) == 0 and i // (sections // len(FACTS)) < len(FACTS):
+            heading, fact, _, _ = FACTS[i // (sections // len(FACTS))]
+            parts.append(f"{heading}:\n{fact} {FILLER}")
+        else:
+            parts.append(f"HOSPITAL DAY {i + 1}:\n{FILLER * 3}")
+    return "\n\n".join(parts)
+
+
+async def _ask(note: str, question: str, use_retrieval: bool):
+    from concurrency import run_snowflake
+    from retrieval import relevant_context_async
+    from summarizer import answer_from_snowflake, build_qa_prompt
+
+    start = time.perf_counter()
+    context = await relevant_context_async(note, question) if use_retrieval else note
+    await run_snowflake(answer_from_snowflake, context, question)
+    return time.perf_counter() - start, len(build_qa_prompt(context, question)), context
+
+
+async def _run(note: str, rounds: int):
+    results = {}
+    for label, use_retrieval in (("full", False), ("retrieval", True)):
+        samples = []
+        for _ in range(rounds):
+            for _, _, question, answer in FACTS:
+                seconds, chars, context = await _ask(note, question, use_retrieval)
+                samples.append((seconds, chars, answer in context))
+        results[label] = samples
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--stub-delay", type=float, default=0.2, help="seconds per Cortex query")
+    parser.add_argument("--kchar-delay", type=float, default=0.02, help="seconds per 1000 prompt characters")
+    args = parser.parse_args()
+
+    from retrieval import build_index, index_stats
+    from snowflake_pool import ConnectionPool, init_pool
+
+    init_pool(ConnectionPool(connect=lambda: FakeConnection(args.stub_delay, kchar_delay=args.kchar_delay)))
+    note = make_record(args.sections)
+
+    start = time.perf_counter()
+    index = build_index(note)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"record: {len(note)} chars, {len(index.passages)} passages, index built in {build_ms:.1f}ms")
+
+    results = asyncio.run(_run(note, args.rounds))
+    print(f"{'mode':<10} {'prompt chars':>12} {'p50':>9} {'p95':>9} {'found':>6}")
+    for label, samples in results.items():
+        chars = sum(s[1] for s in samples) / len(samples)
+        p50 = percentile([s[0] for s in samples], 50)
+        p95 = percentile([s[0] for s in samples], 95)
+        found = sum(s[2] for s in samples)
+        print(f"{label:<10} {chars:>12.0f} {p50 * 1000:>7.1f}ms {p95 * 1000:>7.1f}ms {found:>3}/{len(samples)}")
+    print(f"index cache: {index_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Upstream SerpAPI calls and fallback latency with the search client versus a
+plain request per fallback.
+
+Simulated users ask questions drawn from a small, skewed pool, the way the
+same drug-interaction questions recur across patients, against a local stub
+that takes SERPAPI_DELAY per request and fails the first few with a 503.
+"direct" is the old fallback: one GET per question, no cache or retries.
+"client" goes through SearchClient with its normalized-query cache, request
+coalescing, token bucket and retries.
+
+Run from backend/:  python -m benchmarks.bench_search [--users 20 --questions 10]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.stubs import StubServer, percentile
+
+QUESTIONS = [
+    "Can I take ibuprofen with amoxicillin?",
+    "Does metformin interact with alcohol?",
+    "Can I drink grapefruit juice on atorvastatin?",
+    "Is St. John's wort safe with sertraline?",
+    "Can I take Tylenol with lisinopril?",
+    "Does omeprazole interact with clopidogrel?",
+    "Can I take antacids with levothyroxine?",
+    "Is it safe to take aspirin with warfarin?",
+]
+
+
+class FlakySerpAPI(StubServer):
+    def __init__(self, body: dict, delay: float, failures: int):
+        super().__init__(body, delay)
+        self.failures = failures
+
+    def respond(self, handler) -> None:
+        if self.requests <= self.failures:
+            handler.send_response(503)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+        super().respond(handler)
+
+
+def _workload(users: int, questions: int) -> list:
+    rng = random.Random(7)
+    # Zipf-like: the first questions are asked far more often than the rest.
+    weights = [1 / (rank + 1) for rank in range(len(QUESTIONS))]
+    return [
+        [rng.choices(QUESTIONS, weights)[0].replace("?", rng.choice(["?", "", " ?"]))
+         for _ in range(questions)]
+        for _ in range(users)
+    ]
+
+
+async def _direct(url: str, question: str) -> bool:
+    from http_client import get_http_client
+
+    try:
+        res = await get_http_client().get(url, params={"engine": "google", "q": question})
+        return res.status_code == 200
+    except Exception:
+        return False
+
+
+async def _run(url: str, workload: list, use_client: bool):
+    from http_client import close_http_client
+    from search_client import SearchError, get_search_client
+
+    latencies, failed = [], 0
+
+    async def user(questions):
+        nonlocal failed
+        for question in questions:
+            start = time.perf_counter()
+            if use_client:
+                try:
+                    await get_search_client().search(question)
+                    ok = True
+                except SearchError:
+                    ok = False
+            else:
+                ok = await _direct(url, question)
+            failed += not ok
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(questions) for questions in workload))
+    elapsed = time.perf_counter() - start
+    # The shared client is bound to this event loop; the next run gets a new one.
+    await close_http_client()
+    return latencies, failed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=10, help="questions per user")
+    parser.add_argument("--serpapi-delay", type=float, default=0.2)
+    parser.add_argument("--failures", type=int, default=3, help="503s before the stub recovers")
+    parser.add_argument("--rate", type=float, default=120, help="SerpAPI requests per minute")
+    args = parser.parse_args()
+
+    from search_client import SearchClient, TokenBucket, init_search_client
+
+    workload = _workload(args.users, args.questions)
+    print(f"{'mode':<7} {'upstream':>8} {'failed':>7} {'p50':>9} {'p95':>9} {'seconds':>8}")
+    for label in ("direct", "client"):
+        body = {"answer_box": {"snippet": "Ask your pharmacist."}}
+        with FlakySerpAPI(body, args.serpapi_delay, args.failures) as serpapi:
+            url = serpapi.url + "/search"
+            init_search_client(SearchClient(url=url, bucket=TokenBucket(args.rate / 60, burst=5),
+                                            backoff=0.1))
+            latencies, failed, elapsed = asyncio.run(_run(url, workload, label == "client"))
+            print(
+                f"{label:<7} {serpapi.requests:>8} {failed:>7} "
+                f"{percentile(latencies, 50) * 1000:>7.1f}ms {percentile(latencies, 95) * 1000:>7.1f}ms "
+                f"{elapsed:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Worker startup cost: time to `import app`, time until the worker answers its
+first request and reports ready, and latency of the first real request.
+
+Import time is measured in fresh interpreters, with the parser and connector
+libraries imported lazily (as the app does) and eagerly (imported up front,
+as the app used to). The server cases spawn uvicorn with STARTUP_WARMUP set
+to "none" and to "parsers,snowflake", backed by fake Snowflake connections
+that take CONNECT_DELAY to open, then upload a small PDF to
+/api/summarize-file as the first request.
+
+Run from backend/:  python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+EAGER_IMPORTS = "import fitz, docx, snowflake.connector, requests, websockets"
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+{preload}
+import app
+print(time.perf_counter() - start)
+"""
+
+
+def _import_seconds(eager: bool) -> float:
+    script = IMPORT_SCRIPT.format(preload=EAGER_IMPORTS if eager else "")
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _serve(port: int, connect_delay: float) -> None:
+    import uvicorn
+
+    import snowflake_pool
+    from benchmarks.stubs import FakeConnection
+
+    def connect():
+        time.sleep(connect_delay)
+        return FakeConnection(0.05)
+
+    # The lifespan builds its pool from the environment; hand it fake connections instead.
+    snowflake_pool.ConnectionPool.from_env = classmethod(lambda cls: cls(connect=connect))
+    uvicorn.run("app:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def _sample_pdf() -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Diagnosis: seasonal allergies.\nMedications: cetirizine 10 mg daily.")
+    return doc.tobytes()
+
+
+def _server_case(port: int, warmup: str, connect_delay: float, pdf: bytes) -> dict:
+    env = dict(os.environ, STARTUP_WARMUP=warmup)
+    cmd = [sys.executable, "-m", "benchmarks.bench_startup", "--serve", str(port),
+           "--connect-delay", str(connect_delay)]
+    spawned = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            while "ready" not in result:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"Server exited with code {proc.returncode}")
+                try:
+                    res = client.get("/api/ready")
+                except httpx.TransportError:
+                    time.sleep(0.01)
+                    continue
+                result.setdefault("first_response", time.perf_counter() - spawned)
+                if res.status_code == 200:
+                    result["ready"] = time.perf_counter() - spawned
+                else:
+                    time.sleep(0.01)
+
+            start = time.perf_counter()
+            res = client.post("/api/summarize-file", files={"file": ("note.pdf", pdf, "application/pdf")})
+            res.raise_for_status()
+            result["first_request"] = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--connect-delay", type=float, default=1.0, help="seconds to open a Snowflake connection")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        _serve(args.serve, args.connect_delay)
+        return
+
+    for eager in (True, False):
+        samples = [_import_seconds(eager) for _ in range(args.runs)]
+        label = "eager" if eager else "lazy"
+        print(f"import app ({label:5}):  median {statistics.median(samples) * 1000:6.0f} ms over {args.runs} runs")
+
+    pdf = _sample_pdf()
+    for warmup in ("none", "parsers,snowflake"):
+        runs = [_server_case(args.port, warmup, args.connect_delay, pdf) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+        print(
+            f"STARTUP_WARMUP={warmup:17}  first response {median['first_response']:6.0f} ms  "
+            f"ready {median['ready']:6.0f} ms  first summarize-file {median['first_request']:6.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
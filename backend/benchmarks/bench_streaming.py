@@ -0,0 +1,94 @@
+"""
+Time-to-first-byte of the streaming endpoints versus the blocking ones.
+
+Both paths see the same simulated model: STUB_DELAY seconds before the first
+token, then one token every TOKEN_DELAY seconds. The blocking path gets it
+from a fake Snowflake connector that sleeps for the whole generation; the
+streaming path reads it from a local Cortex REST stub over server-sent events.
+
+Run from backend/:  python -m benchmarks.bench_streaming
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+os.environ["SNOWFLAKE_PAT"] = "stub-token"
+# The app is started against stubs; its warm-up would try real Snowflake.
+os.environ.setdefault("STARTUP_WARMUP", "none")
+
+import httpx
+import uvicorn
+
+from benchmarks.stubs import FakeConnection, StreamingLLMStub, percentile
+
+TOKENS = ["**Diagnosis:** ", "acute ", "bronchitis. ", "Take ", "amoxicillin ", "500mg ", "twice ",
+          "daily ", "for ", "7 ", "days.\n", "**Follow-up:** ", "return ", "if ", "fever ", "persists."] * 4
+
+
+def _start_app(port: int) -> uvicorn.Server:
+    from app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _timed(client: httpx.AsyncClient, path: str, body: dict):
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", path, json=body) as res:
+        async for _ in res.aiter_bytes():
+            if first is None:
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def _run(base_url: str, rounds: int):
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for label, path in (
+            ("summarize (blocking)", "/api/summarize-text"),
+            ("summarize (stream)", "/api/summarize-text/stream"),
+            ("ask (blocking)", "/api/ask"),
+            ("ask (stream)", "/api/ask/stream"),
+        ):
+            samples = []
+            for i in range(rounds):
+                # A fresh note each round keeps the summary cache out of the picture.
+                body = {"note": f"Visit {label} {i}: cough and fever.", "question": "What was prescribed?"}
+                samples.append(await _timed(client, path, body))
+            results[label] = samples
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--stub-delay", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="seconds between tokens")
+    args = parser.parse_args()
+
+    with StreamingLLMStub(TOKENS, delay=args.stub_delay, token_delay=args.token_delay) as llm:
+        os.environ["CORTEX_REST_URL"] = llm.url + "/api/v2/cortex/inference:complete"
+        server = _start_app(port=8766)
+
+        from snowflake_pool import ConnectionPool, init_pool
+        generation = args.stub_delay + args.token_delay * len(TOKENS)
+        init_pool(ConnectionPool(connect=lambda: FakeConnection(generation, reply="".join(TOKENS))))
+
+        results = asyncio.run(_run("http://127.0.0.1:8766", args.rounds))
+        print(f"{'endpoint':<22} {'TTFB p50':>10} {'total p50':>10}")
+        for label, samples in results.items():
+            ttfb = percentile([s[0] for s in samples], 50)
+            total = percentile([s[1] for s in samples], 50)
+            print(f"{label:<22} {ttfb * 1000:>8.1f}ms {total * 1000:>8.1f}ms")
+
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Time to first transcript text for live WebSocket transcription versus
+uploading the finished recording to /api/transcribe-audio.
+
+A recording of CHUNKS pieces is produced in real time, one every
+CHUNK_INTERVAL seconds. The upload path sends it once recording stops, to a
+local Deepgram stub that answers after DEEPGRAM_DELAY. The live path streams
+each chunk to /api/transcribe-stream as it is recorded, backed by the fake
+streaming transcriber from benchmarks.stubs.
+
+Run from backend/:  python -m benchmarks.bench_transcribe [--chunks 40]
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+
+# The app is started against stubs; its warm-up would try real Snowflake.
+os.environ.setdefault("STARTUP_WARMUP", "none")
+
+import httpx
+import uvicorn
+import websockets
+
+from benchmarks.stubs import FakeTranscriber, StubServer
+
+SPEECH = (
+    "I have had a dull headache since Monday. It gets worse at night and "
+    "ibuprofen only helps for a few hours. Should I be worried? "
+).split()
+
+
+def _start_app(port: int) -> uvicorn.Server:
+    from app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _chunks(count: int) -> list:
+    return [f"{SPEECH[i % len(SPEECH)]} ".encode() for i in range(count)]
+
+
+async def _upload(base_url: str, chunks: list, interval: float):
+    start = time.perf_counter()
+    recorded = b""
+    for chunk in chunks:
+        await asyncio.sleep(interval)
+        recorded += chunk
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        res = await client.post("/api/transcribe-audio", files={"audio": ("a.webm", recorded, "audio/webm")})
+        res.raise_for_status()
+    done = time.perf_counter() - start
+    return done, done
+
+
+async def _live(ws_url: str, chunks: list, interval: float):
+    start = time.perf_counter()
+    first = None
+    async with websockets.connect(ws_url) as ws:
+        async def record():
+            for chunk in chunks:
+                await asyncio.sleep(interval)
+                await ws.send(chunk)
+            await ws.send(json.dumps({"type": "stop"}))
+
+        sender = asyncio.create_task(record())
+        async for message in ws:
+            event = json.loads(message)
+            if first is None and event["type"] in ("partial", "final"):
+                first = time.perf_counter() - start
+            if event["type"] in ("done", "error"):
+                break
+        await sender
+    return first, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-interval", type=float, default=0.1, help="seconds of audio per chunk")
+    parser.add_argument("--deepgram-delay", type=float, default=0.8, help="stub batch transcription time")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="fake live transcriber time per chunk")
+    args = parser.parse_args()
+
+    text = b"".join(_chunks(args.chunks)).decode().strip()
+    body = {"results": {"channels": [{"alternatives": [{"transcript": text}]}]}}
+    with StubServer(body, delay=args.deepgram_delay) as deepgram:
+        os.environ["DEEPGRAM_URL"] = deepgram.url + "/v1/listen"
+        os.environ["DEEPGRAM_API_KEY"] = "stub-key"
+        server = _start_app(port=8769)
+
+        from transcription import set_transcriber_factory
+        set_transcriber_factory(lambda language: FakeTranscriber(language, delay=args.chunk_delay))
+
+        chunks = _chunks(args.chunks)
+        recording = args.chunks * args.chunk_interval
+        upload = asyncio.run(_upload("http://127.0.0.1:8769", chunks, args.chunk_interval))
+        live = asyncio.run(_live("ws://127.0.0.1:8769/api/transcribe-stream", chunks, args.chunk_interval))
+
+        print(f"recording length: {recording:.1f}s in {args.chunks} chunks")
+        print(f"{'mode':<8} {'first text':>11} {'final':>9} {'after stop':>11}")
+        for label, (first, done) in (("upload", upload), ("live", live)):
+            print(f"{label:<8} {first:>10.2f}s {done:>8.2f}s {done - recording:>10.2f}s")
+
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Local stand-ins for Snowflake, Cortex REST, SerpAPI and Deepgram (batch and
+live) used by the benchmarks.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from transcription import StreamingTranscriber
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, query, params=None):
+        # Blocks the calling thread like the real connector does.
+        rows = len(params) // 2 if "FROM VALUES" in query and params else 1
+        time.sleep(
+            self.conn.delay
+            + self.conn.row_delay * (rows - 1)
+            + self.conn.kchar_delay * len(query) / 1000
+        )
+        self.conn.queries += 1
+        if "SELECT 1" in query:
+            self._rows = [(1,)]
+        elif "FROM VALUES" in query:
+            self._rows = [(i, self.conn.reply) for i in range(rows)]
+        else:
+            self._rows = [(self.conn.reply,)]
+        return self
+
+    def fetchone(self):
+        return self._rows[0]
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, delay: float = 0.05, reply: str = "**Summary:** all good.",
+                 row_delay: float = 0.0, kchar_delay: float = 0.0):
+        # `delay` is the per-query round trip; each extra VALUES row adds
+        # `row_delay` and every 1000 characters of SQL add `kchar_delay`.
+        self.delay = delay
+        self.row_delay = row_delay
+        self.kchar_delay = kchar_delay
+        self.reply = reply
+        self.queries = 0
+        self._closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def is_closed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+
+class StubServer:
+    """
+    Threaded HTTP server answering every request with `body` after `delay`.
+    """
+
+    def __init__(self, body: dict, delay: float = 0.05):
+        stub = self
+        self.body = json.dumps(body).encode()
+        self.delay = delay
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                stub.requests += 1
+                stub.respond(self)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            request_queue_size = 1024
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def respond(self, handler) -> None:
+        time.sleep(self.delay)
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(self.body)))
+        handler.end_headers()
+        handler.wfile.write(self.body)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StreamingLLMStub(StubServer):
+    """
+    Cortex REST stand-in that streams `tokens` as server-sent events, one
+    every `token_delay` seconds after an initial `delay`.
+    """
+
+    def __init__(self, tokens, delay: float = 0.2, token_delay: float = 0.02):
+        super().__init__({}, delay)
+        self.tokens = list(tokens)
+        self.token_delay = token_delay
+
+    def respond(self, handler) -> None:
+        time.sleep(self.delay)
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        try:
+            for token in self.tokens:
+                event = {"choices": [{"delta": {"content": token}}]}
+                handler.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                handler.wfile.flush()
+                time.sleep(self.token_delay)
+            handler.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading early, e.g. on a fallback phrase.
+            pass
+
+
+class FakeTranscriber(StreamingTranscriber):
+    """
+    Live transcription stand-in that treats each "audio" chunk as UTF-8 text.
+    Every chunk takes `delay` seconds to process and yields a partial with the
+    sentence so far; a word ending in . ? or ! closes the sentence as a final.
+    """
+
+    def __init__(self, language: str = "en", delay: float = 0.0):
+        self.language = language
+        self.delay = delay
+        self.chunks = 0
+        self._words = []
+        self._events = asyncio.Queue()
+
+    async def send(self, chunk: bytes) -> None:
+        await asyncio.sleep(self.delay)
+        self.chunks += 1
+        for word in chunk.decode("utf-8", "replace").split():
+            self._words.append(word)
+            if word.endswith((".", "?", "!")):
+                await self._events.put({"type": "final", "text": " ".join(self._words)})
+                self._words = []
+        if self._words:
+            await self._events.put({"type": "partial", "text": " ".join(self._words)})
+
+    async def finish(self) -> None:
+        if self._words:
+            await self._events.put({"type": "final", "text": " ".join(self._words)})
+            self._words = []
+        await self._events.put(None)
+
+    async def events(self):
+        while (event := await self._events.get()) is not None:
+            yield event
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
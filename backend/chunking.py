@@ -0,0 +1,104 @@
+import re
+import zlib
+
+# Rough token estimate for English clinical text; Cortex does not expose a
+# tokenizer, and chunk budgets only need to be in the right ballpark.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _is_anchor(text: str, max_tokens: int) -> bool:
+    # Sections are anchors with probability proportional to their size, about
+    # one per third of a budget of text. The draw is a hash of the section's
+    # own text, so it does not depend on where the section falls.
+    return zlib.crc32(text.encode("utf-8")) * max_tokens < estimate_tokens(text) * 3 * 2**32
+
+
+def chunk_sections(sections, max_tokens: int) -> list:
+    """
+    Pack consecutive (label, text) sections into (label, text) chunks of at
+    most `max_tokens` each. Sections are never merged across a chunk boundary;
+    a single oversized section is split at paragraph, then sentence, breaks.
+    Boundaries are chosen from the sections' content (see ChunkPacker), so
+    editing one section changes only the chunks around it.
+    """
+    packer = ChunkPacker(max_tokens)
+    chunks = []
+    for label, text in sections:
+        chunks.extend(packer.add(label, text))
+    chunks.extend(packer.flush())
+    return chunks
+
+
+class ChunkPacker:
+    """
+    Incremental chunk_sections: feed sections one at a time with add() and
+    collect chunks as soon as they are complete, so a long document never has
+    to be held in memory as a whole.
+
+    A chunk ends after an anchor section (picked by a hash of its text) once
+    it is a quarter full, or earlier when the next section would not fit. Packing
+    greedily up to the budget would shift every later boundary when one page
+    grows or shrinks; with anchors the chunks after an edit line up again at
+    the next anchor, and their cached map summaries are reused.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self._labels, self._texts, self._size = [], [], 0
+
+    def add(self, label: str, text: str) -> list:
+        if estimate_tokens(text) <= self.max_tokens:
+            pieces = [(label, text)]
+        else:
+            parts = _split_oversized(text, self.max_tokens)
+            pieces = [
+                (f"{label} (part {i} of {len(parts)})", part) for i, part in enumerate(parts, 1)
+            ]
+
+        chunks = []
+        for label, text in pieces:
+            tokens = estimate_tokens(text)
+            if self._texts and self._size + tokens > self.max_tokens:
+                chunks.extend(self.flush())
+            self._labels.append(label)
+            self._texts.append(text)
+            self._size += tokens
+            if self._size * 4 >= self.max_tokens and _is_anchor(text, self.max_tokens):
+                chunks.extend(self.flush())
+        return chunks
+
+    def flush(self) -> list:
+        if not self._texts:
+            return []
+        labels, texts = self._labels, self._texts
+        self._labels, self._texts, self._size = [], [], 0
+        label = labels[0] if len(labels) == 1 else f"{labels[0]} to {labels[-1]}"
+        return [(label, "\n\n".join(texts))]
+
+
+def _split_oversized(text: str, max_tokens: int) -> list:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    units, sep = [p for p in re.split(r"\n\s*\n", text) if p.strip()], "\n\n"
+    if len(units) <= 1:
+        units, sep = re.split(r"(?<=[.!?])\s+", text), " "
+
+    parts, current = [], ""
+    for unit in units:
+        # Hard-wrap anything that still does not fit, e.g. OCR text without punctuation.
+        while len(unit) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(unit[:max_chars])
+            unit = unit[max_chars:]
+        if current and len(current) + len(sep) + len(unit) > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current}{sep}{unit}" if current else unit
+    if current.strip():
+        parts.append(current)
+    return parts
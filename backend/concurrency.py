@@ -0,0 +1,166 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from extractor import preload_parsers
+from metrics import observe_stage, stage_errors
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+class BackendLimiter:
+    """
+    Caps the number of in-flight calls to one backend so a slow dependency
+    queues its own callers instead of starving everyone else.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self._sem = None
+
+    def reset(self) -> None:
+        # asyncio primitives bind to the loop that first uses them, so they are
+        # recreated whenever the app (and therefore the loop) starts.
+        self._sem = None
+        self.in_flight = 0
+
+    async def __aenter__(self):
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.limit)
+        await self._sem.acquire()
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.in_flight -= 1
+        self._sem.release()
+        return False
+
+
+snowflake_limit = BackendLimiter(
+    "snowflake", env_int("SNOWFLAKE_MAX_CONCURRENCY", env_int("SNOWFLAKE_POOL_SIZE", 4))
+)
+extract_limit = BackendLimiter("extract", env_int("EXTRACT_MAX_WORKERS", os.cpu_count() or 2))
+serpapi_limit = BackendLimiter("serpapi", env_int("SERPAPI_MAX_CONCURRENCY", 8))
+deepgram_limit = BackendLimiter("deepgram", env_int("DEEPGRAM_MAX_CONCURRENCY", 8))
+cortex_stream_limit = BackendLimiter("cortex_stream", env_int("CORTEX_STREAM_MAX_CONCURRENCY", 16))
+transcribe_stream_limit = BackendLimiter(
+    "transcribe_stream", env_int("TRANSCRIBE_STREAM_MAX_CONCURRENCY", 16)
+)
+
+LIMITERS = (
+    snowflake_limit, extract_limit, serpapi_limit, deepgram_limit, cortex_stream_limit,
+    transcribe_stream_limit,
+)
+
+_snowflake_executor = None
+_extract_executor = None
+
+
+def start_executors() -> None:
+    """
+    Create the worker pools for blocking work. Called from the app lifespan.
+    """
+    global _snowflake_executor, _extract_executor
+    shutdown_executors()
+    for limiter in LIMITERS:
+        limiter.reset()
+    _snowflake_executor = ThreadPoolExecutor(
+        max_workers=snowflake_limit.limit, thread_name_prefix="snowflake"
+    )
+    # PyMuPDF parsing is CPU-bound, so it gets real processes by default.
+    if os.getenv("EXTRACT_EXECUTOR", "process") == "thread":
+        _extract_executor = ThreadPoolExecutor(
+            max_workers=extract_limit.limit, thread_name_prefix="extract"
+        )
+    else:
+        # Workers must not be forked from this process: a fork taken while
+        # another thread holds an import lock (e.g. the warm-up loading fitz)
+        # leaves the child stuck on that lock for good. Forkserver/spawn
+        # workers start clean and import the parsers once, up front.
+        _extract_executor = ProcessPoolExecutor(
+            max_workers=extract_limit.limit,
+            mp_context=multiprocessing.get_context(_worker_start_method()),
+            initializer=preload_parsers,
+        )
+
+
+def _worker_start_method() -> str:
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+def shutdown_executors() -> None:
+    global _snowflake_executor, _extract_executor
+    for executor in (_snowflake_executor, _extract_executor):
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    _snowflake_executor = None
+    _extract_executor = None
+
+
+async def run_snowflake(fn, *args, **kwargs):
+    """
+    Run a blocking Snowflake call on the Snowflake thread pool.
+    """
+    global _snowflake_executor
+    if _snowflake_executor is None:
+        _snowflake_executor = ThreadPoolExecutor(
+            max_workers=snowflake_limit.limit, thread_name_prefix="snowflake"
+        )
+    # Copy the context so stages timed on the worker count toward this request.
+    context = contextvars.copy_context()
+    async with snowflake_limit:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _snowflake_executor, functools.partial(context.run, fn, *args, **kwargs)
+        )
+
+
+async def run_extraction(fn, *args, **kwargs):
+    """
+    Run a document parser on the extraction pool. `fn` and its arguments must
+    be picklable when the pool uses processes.
+    """
+    global _extract_executor
+    if _extract_executor is None:
+        _extract_executor = ThreadPoolExecutor(
+            max_workers=extract_limit.limit, thread_name_prefix="extract"
+        )
+    stage = f"extract.{fn.__name__}"
+    start = time.perf_counter()
+    try:
+        async with extract_limit:
+            loop = asyncio.get_running_loop()
+            result, seconds = await loop.run_in_executor(
+                _extract_executor, functools.partial(_timed, fn, *args, **kwargs)
+            )
+    except Exception:
+        stage_errors.inc(stage=stage)
+        raise
+    # Parse time is measured in the worker; the rest was spent queued or pickling.
+    observe_stage(stage, seconds)
+    observe_stage("extract.wait", time.perf_counter() - start - seconds)
+    return result
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def limiter_stats() -> dict:
+    return {
+        limiter.name: {"limit": limiter.limit, "in_flight": limiter.in_flight}
+        for limiter in LIMITERS
+    }
@@ -0,0 +1,117 @@
+import json
+import os
+import time
+
+from concurrency import cortex_stream_limit, run_snowflake
+from http_client import get_http_client
+from metrics import observe_stage, span
+from snowflake_pool import get_pool
+
+
+def complete(prompt: str, model: str) -> str:
+    """
+    Run one Snowflake Cortex COMPLETE() query and return the raw completion
+    ("" if Cortex returned nothing). Errors propagate to the caller.
+    """
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        try:
+            query = f"""
+            SELECT snowflake.cortex.complete(
+                '{model}',
+                $$ {prompt} $$
+            ) AS completion;
+            """
+            with span("cortex.complete"):
+                cursor.execute(query)
+                row = cursor.fetchone()
+            return row[0] if row and row[0] else ""
+        finally:
+            cursor.close()
+
+
+def complete_many(prompts: list, model: str) -> list:
+    """
+    Run several prompts through Cortex in one query, one VALUES row per
+    prompt. Returns completions in prompt order, with None for any row Cortex
+    could not complete (TRY_COMPLETE keeps one bad row from failing the rest).
+    """
+    if not prompts:
+        return []
+    rows = ", ".join(["(%s, %s)"] * len(prompts))
+    params = [value for i, prompt in enumerate(prompts) for value in (i, prompt)]
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        try:
+            query = f"""
+            SELECT column1, snowflake.cortex.try_complete('{model}', column2) AS completion
+            FROM VALUES {rows}
+            ORDER BY column1;
+            """
+            with span("cortex.complete_many"):
+                cursor.execute(query, params)
+                results = cursor.fetchall()
+            completions = [None] * len(prompts)
+            for index, completion in results:
+                completions[int(index)] = completion or None
+            return completions
+        finally:
+            cursor.close()
+
+
+def _rest_url() -> str:
+    url = os.getenv("CORTEX_REST_URL")
+    if url:
+        return url
+    account = os.getenv("SNOWFLAKE_ACCOUNT")
+    return f"https://{account}.snowflakecomputing.com/api/v2/cortex/inference:complete"
+
+
+def streaming_enabled() -> bool:
+    """
+    Token streaming needs the Cortex REST API, which authenticates with a
+    programmatic access token rather than the connector's password login.
+    """
+    return bool(os.getenv("SNOWFLAKE_PAT"))
+
+
+async def stream_complete(prompt: str, model: str):
+    """
+    Yield completion text as Cortex generates it, via the REST API's
+    server-sent events. Without SNOWFLAKE_PAT this degrades to a single chunk
+    from the SQL COMPLETE() path.
+    """
+    if not streaming_enabled():
+        yield await run_snowflake(complete, prompt, model)
+        return
+
+    headers = {
+        "Authorization": f"Bearer {os.getenv('SNOWFLAKE_PAT')}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+    }
+    body = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": True,
+    }
+    start = time.perf_counter()
+    first = True
+    async with cortex_stream_limit:
+        with span("cortex.stream"):
+            async with get_http_client().stream("POST", _rest_url(), headers=headers, json=body) as res:
+                res.raise_for_status()
+                async for line in res.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    for choice in json.loads(data).get("choices", []):
+                        delta = choice.get("delta") or {}
+                        text = delta.get("content") or delta.get("text")
+                        if text:
+                            if first:
+                                observe_stage("cortex.stream_first_token", time.perf_counter() - start)
+                                first = False
+                            yield text
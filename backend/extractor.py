@@ -1,6 +1,21 @@
+import itertools
 import os
-import fitz      # PyMuPDF
-from docx import Document
+
+# PyMuPDF and python-docx are imported on first use so that importing this
+# module (and the app) stays cheap; preload_parsers() loads them up front.
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+# Sections without a heading are cut at this size so one section never
+# holds an unbounded amount of text.
+MAX_SECTION_CHARS = 16000
+
+def preload_parsers() -> None:
+    """
+    Import the PDF and DOCX parsers now instead of on the first upload.
+    """
+    import fitz  # noqa: F401
+    import docx  # noqa: F401
 
 def extract_text(path: str) -> str:
     """
@@ -16,14 +31,228 @@ def extract_text(path: str) -> str:
     else:
         raise ValueError(f"Unsupported file type: {ext}")
 
+def iter_text(path: str):
+    """
+    Yield the text of a PDF, DOCX, or TXT file one page, paragraph, or line
+    at a time, without holding the whole document's text in memory.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        return _iter_pdf(path)
+    elif ext in (".docx", ".doc"):
+        return _iter_docx(path)
+    elif ext == ".txt":
+        return _iter_txt(path)
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
 def _extract_pdf(path: str) -> str:
-    doc = fitz.open(path)
-    return "\n".join(page.get_text() for page in doc).strip()
+    return "\n".join(_iter_pdf(path)).strip()
 
 def _extract_docx(path: str) -> str:
-    doc = Document(path)
-    return "\n".join(p.text for p in doc.paragraphs).strip()
+    return "\n".join(_iter_docx(path)).strip()
 
 def _extract_txt(path: str) -> str:
+    return "\n".join(_iter_txt(path)).strip()
+
+def _iter_pdf(path: str, start_page: int = 0, max_pages: int = None):
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        stop = doc.page_count if max_pages is None else min(doc.page_count, start_page + max_pages)
+        for number in range(start_page, stop):
+            # Load one page at a time so only the current page's objects are alive.
+            yield doc.load_page(number).get_text()
+
+def _docx_paragraphs(path: str, start: int = 0):
+    """
+    Yield (style name, text) per body paragraph, from paragraph `start` on. Paragraph.style resolves the
+    style from scratch on every access, so names are looked up by style id in
+    a table built once per document.
+    """
+    from docx import Document
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml.ns import qn
+    from docx.text.paragraph import Paragraph
+
+    doc = Document(path)
+    names = {style.style_id: style.name for style in doc.styles}
+    default = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+    default_name = default.name if default is not None else ""
+    # Walk the body lazily instead of building Document.paragraphs up front.
+    elements = doc.element.body.iterchildren(qn("w:p"))
+    for element in itertools.islice(elements, start, None):
+        style_id = element.style
+        name = names.get(style_id, default_name) if style_id else default_name
+        yield name, Paragraph(element, doc._body).text
+
+def _iter_docx(path: str):
+    for _, text in _docx_paragraphs(path):
+        yield text
+
+def _iter_txt(path: str):
     with open(path, "r", encoding="utf-8") as f:
-        return f.read().strip()
\ No newline at end of file
+        for line in f:
+            yield line.rstrip("\n")
+
+def pdf_page_count(path: str) -> int:
+    import fitz
+
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def extract_sections(path: str, start_page: int = 0, max_pages: int = None,
+                     headings: bool = True) -> list:
+    """
+    Load a PDF, DOCX, or TXT file as a list of (label, text) sections split on
+    page and heading boundaries, for chunked summarization of long records.
+    `start_page`/`max_pages` select a window of a PDF so large files can be
+    processed in batches. With `headings` off, PDF pages are not split on
+    headings, which skips the slower font-size pass.
+    """
+    return list(iter_sections(path, start_page, max_pages, headings))
+
+def iter_sections(path: str, start_page: int = 0, max_pages: int = None, headings: bool = True):
+    """
+    Generator form of extract_sections.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        if not headings:
+            return _pdf_pages(path, start_page, max_pages)
+        return _pdf_sections(path, start_page, max_pages)
+    elif ext in (".docx", ".doc"):
+        return _docx_sections(_docx_paragraphs(path), "Document")
+    elif ext == ".txt":
+        return _split_lines(_iter_txt(path), "Note")
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+def extract_sections_window(path: str, start: int = 0, max_chars: int = 262144, label: str = None) -> tuple:
+    """
+    Sections for one window of about `max_chars` characters of a DOCX or TXT
+    file, so large files can be processed in batches like PDF pages. `start`
+    is a paragraph index (DOCX) or byte offset (TXT), and `label` is the
+    section label the previous window ended in (None for the first window).
+    Returns (sections, next_start, label); next_start is None at the end.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    # A window that starts mid-section carries on under the previous label.
+    if ext in (".docx", ".doc"):
+        paragraphs, next_start = _docx_window(path, start, max_chars)
+        sections = list(_docx_sections(paragraphs, _continued(label) if label else "Document"))
+    elif ext == ".txt":
+        lines, next_start = _txt_window(path, start, max_chars)
+        sections = list(_split_lines(lines, _continued(label) if label else "Note"))
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+    return sections, next_start, sections[-1][0] if sections else label
+
+def _docx_window(path: str, start: int, max_chars: int):
+    paragraphs, size = [], 0
+    for paragraph in _docx_paragraphs(path, start):
+        if size >= max_chars:
+            return paragraphs, start + len(paragraphs)
+        paragraphs.append(paragraph)
+        size += len(paragraph[1]) + 1
+    return paragraphs, None
+
+def _txt_window(path: str, offset: int, max_chars: int):
+    lines, size = [], 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while size < max_chars:
+            raw = f.readline()
+            if not raw:
+                return lines, None
+            line = raw.decode("utf-8").rstrip("\r\n")
+            lines.append(line)
+            size += len(line) + 1
+        return lines, f.tell() if f.peek(1) else None
+
+def _pdf_pages(path: str, start_page: int = 0, max_pages: int = None):
+    for number, text in enumerate(_iter_pdf(path, start_page, max_pages), start_page):
+        if text.strip():
+            yield f"Page {number + 1}", text.strip()
+
+def _pdf_sections(path: str, start_page: int = 0, max_pages: int = None):
+    import fitz
+
+    with fitz.open(path) as doc:
+        stop = doc.page_count if max_pages is None else min(doc.page_count, start_page + max_pages)
+        for number in range(start_page, stop):
+            label = f"Page {number + 1}"
+            lines = []
+            for heading, line in _pdf_lines(doc.load_page(number)):
+                if heading and any(l.strip() for l in lines):
+                    yield label, "\n".join(lines).strip()
+                    lines = []
+                if heading:
+                    label = f"Page {number + 1}: {line.strip()}"
+                lines.append(line)
+            if any(l.strip() for l in lines):
+                yield label, "\n".join(lines).strip()
+
+def _pdf_lines(page):
+    """
+    Yield (is_heading, text) per line. A heading is a short line set in a
+    noticeably larger font than the page's body text.
+    """
+    import fitz
+
+    lines = []
+    for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+        for line in block.get("lines", []):
+            spans = line["spans"]
+            text = "".join(s["text"] for s in spans)
+            size = max((s["size"] for s in spans), default=0)
+            lines.append((text, size))
+    sizes = sorted(size for text, size in lines if text.strip())
+    body_size = sizes[len(sizes) // 2] if sizes else 0
+    for text, size in lines:
+        yield (size >= body_size * 1.2 and 0 < len(text.strip()) <= 80), text
+
+def _docx_sections(paragraphs, label: str):
+    lines, size = [], 0
+    for style, text in paragraphs:
+        if style.startswith("Heading") or style == "Title":
+            if any(l.strip() for l in lines):
+                yield label, "\n".join(lines).strip()
+            label, lines, size = text.strip() or label, [], 0
+        elif size > MAX_SECTION_CHARS:
+            yield label, "\n".join(lines).strip()
+            label, lines, size = _continued(label), [], 0
+        lines.append(text)
+        size += len(text) + 1
+    if any(l.strip() for l in lines):
+        yield label, "\n".join(lines).strip()
+
+def split_text_sections(text: str) -> list:
+    """
+    Split plain text into (label, text) sections at heading-like lines, e.g.
+    "Assessment:" or "DISCHARGE MEDICATIONS".
+    """
+    return list(_split_lines(text.splitlines(), "Note"))
+
+def _split_lines(lines, label: str):
+    current, size = [], 0
+    for line in lines:
+        stripped = line.strip()
+        is_heading = 0 < len(stripped) <= 60 and (
+            stripped.endswith(":") or (stripped.isupper() and any(c.isalpha() for c in stripped))
+        )
+        if is_heading:
+            if any(l.strip() for l in current):
+                yield label, "\n".join(current).strip()
+            label, current, size = stripped.rstrip(":"), [], 0
+        elif size > MAX_SECTION_CHARS:
+            yield label, "\n".join(current).strip()
+            label, current, size = _continued(label), [], 0
+        current.append(line)
+        size += len(line) + 1
+    if any(l.strip() for l in current):
+        yield label, "\n".join(current).strip()
+
+def _continued(label: str) -> str:
+    return label if label.endswith("(continued)") else f"{label} (continued)"
@@ -0,0 +1,42 @@
+import os
+
+import httpx
+
+_client = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            float(os.getenv("HTTP_TIMEOUT", "30")),
+            connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+        ),
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        ),
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """
+    Open the shared keep-alive client used for all outbound HTTP calls.
+    """
+    global _client
+    await close_http_client()
+    _client = _build_client()
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,151 @@
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+from chunking import estimate_tokens
+from concurrency import env_int, run_extraction
+from metrics import span
+from extractor import extract_sections, extract_sections_window, pdf_page_count
+
+MAX_UPLOAD_BYTES = env_int("MAX_UPLOAD_MB", 50) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = env_int("UPLOAD_CHUNK_KB", 1024) * 1024
+# PDF pages parsed per extraction task; bounds how much text is in flight.
+EXTRACT_BATCH_PAGES = env_int("EXTRACT_BATCH_PAGES", 20)
+# The same bound for DOCX and TXT files, in characters of text per task.
+EXTRACT_BATCH_CHARS = env_int("EXTRACT_BATCH_KB", 256) * 1024
+
+
+class MaxUploadSizeMiddleware:
+    """
+    Reject request bodies over `max_bytes` on the given path prefixes before
+    they are buffered: up front from Content-Length, or mid-stream for
+    chunked uploads that do not declare a length.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES, paths=("/api/",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes and not started:
+                    # Answer now and tell the app the client went away, so it
+                    # stops reading instead of buffering the rest of the body.
+                    rejected = True
+                    await self._reject(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except Exception:
+            if not rejected:
+                raise
+
+    async def _reject(self, scope, receive, send):
+        limit_mb = self.max_bytes // (1024 * 1024)
+        response = JSONResponse(
+            {"detail": f"Upload exceeds the {limit_mb} MB limit"}, status_code=413
+        )
+        await response(scope, receive, send)
+
+
+async def save_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """
+    Copy an upload to a temp file in UPLOAD_CHUNK_SIZE pieces, so at most one
+    chunk of it is in memory. Returns the temp path; the caller removes it.
+    """
+    suffix = os.path.splitext(file.filename or "")[1]
+    written = 0
+    with span("upload.save"), tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit",
+                    )
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    return tmp.name
+
+
+async def iter_file_sections(path: str, long_tokens: int = None):
+    """
+    Async generator of (label, text) sections for an uploaded file. PDFs are
+    parsed EXTRACT_BATCH_PAGES pages per extraction task, and DOCX and TXT
+    files about EXTRACT_BATCH_KB of text per task, so a large file is never
+    held in memory as a whole.
+
+    Splitting PDF pages on headings needs a slower font-size pass that only
+    pays off for documents that get chunked. With `long_tokens` set, PDFs are
+    read as plain pages until they pass that many tokens; only then are the
+    pages read so far parsed again with headings.
+    """
+    if os.path.splitext(path)[1].lower() != ".pdf":
+        start, label = 0, None
+        while start is not None:
+            sections, start, label = await run_extraction(
+                extract_sections_window, path, start, EXTRACT_BATCH_CHARS, label
+            )
+            for section in sections:
+                yield section
+        return
+
+    pages = await run_extraction(pdf_page_count, path)
+    held, tokens = [], 0
+    headings = long_tokens is None
+    for start in range(0, pages, EXTRACT_BATCH_PAGES):
+        if headings:
+            for section in await run_extraction(extract_sections, path, start, EXTRACT_BATCH_PAGES):
+                yield section
+            continue
+        sections = await run_extraction(extract_sections, path, start, EXTRACT_BATCH_PAGES, False)
+        held.extend(sections)
+        tokens += sum(estimate_tokens(text) for _, text in sections)
+        if tokens > long_tokens:
+            headings, held = True, []
+            for first in range(0, start + EXTRACT_BATCH_PAGES, EXTRACT_BATCH_PAGES):
+                for section in await run_extraction(extract_sections, path, first, EXTRACT_BATCH_PAGES):
+                    yield section
+    # A short document: its plain pages are all there is to summarize.
+    for section in held:
+        yield section
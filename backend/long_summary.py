@@ -0,0 +1,185 @@
+import asyncio
+
+from chunking import ChunkPacker, estimate_tokens
+from concurrency import env_int, run_snowflake
+from cortex import complete
+from metrics import long_document_chunks
+from summarizer import SUMMARY_MODEL, SUMMARY_ERROR, clean_summary, summarize_with_cache, stream_summary
+from summary_cache import get_cache, make_key
+
+# Documents above this size are summarized chunk by chunk, then merged.
+LONG_DOC_TOKENS = env_int("LONG_DOC_TOKENS", 6000)
+CHUNK_TOKENS = env_int("SUMMARY_CHUNK_TOKENS", 3000)
+MAP_CONCURRENCY = env_int("SUMMARY_MAP_CONCURRENCY", 4)
+# Bump whenever the map or reduce prompts change so cached partials are not reused.
+CHUNK_PROMPT_VERSION = "1"
+
+
+class ChunkSummaryError(Exception):
+    """A Cortex call for one map or reduce step failed."""
+
+
+def build_map_prompt(label: str, text: str) -> str:
+    return (
+        "The following is one excerpt of a longer patient medical record "
+        f"({label}). Write concise clinical notes for this excerpt only. Keep every "
+        "diagnosis, medication with dose and frequency, test result, date, "
+        "allergy and follow-up instruction. Do not add anything that is not in "
+        f"the excerpt.\n\n{text}"
+    )
+
+
+def build_reduce_prompt(partials: list) -> str:
+    joined = "\n\n".join(partials)
+    return (
+        "The following are clinical notes taken from consecutive parts of one "
+        "patient's medical record. Merge them into a single set of concise "
+        "clinical notes. Remove repetition but keep every diagnosis, medication "
+        "with dose and frequency, test result, date, allergy and follow-up "
+        f"instruction.\n\n{joined}"
+    )
+
+
+async def _complete_cached(kind: str, text: str, prompt: str) -> str:
+    """
+    One Cortex call for an intermediate step, cached on its input text so an
+    unchanged chunk of an edited record is never summarized twice.
+    """
+    async def compute():
+        try:
+            raw = await run_snowflake(complete, prompt, SUMMARY_MODEL)
+        except Exception as e:
+            raise ChunkSummaryError(f"{kind} step failed: {e}") from e
+        if not raw.strip():
+            raise ChunkSummaryError(f"Cortex returned no output for {kind} step")
+        return clean_summary(raw).strip()
+
+    key = make_key(text, kind, CHUNK_PROMPT_VERSION, SUMMARY_MODEL)
+    return await get_cache().get_or_compute(key, compute)
+
+
+async def _map(sections, first: list) -> list:
+    """
+    Summarize chunks as soon as the packer completes them. Chunk tasks are
+    started under a semaphore, so at most MAP_CONCURRENCY chunk texts are held
+    while the rest of the document is still being read.
+    """
+    sem = asyncio.Semaphore(MAP_CONCURRENCY)
+    packer = ChunkPacker(CHUNK_TOKENS)
+    tasks = []
+
+    async def summarize_chunk(label, text):
+        try:
+            return await _complete_cached("map", text, build_map_prompt(label, text))
+        finally:
+            sem.release()
+
+    async def start(chunks):
+        for label, text in chunks:
+            await sem.acquire()
+            tasks.append(asyncio.create_task(summarize_chunk(label, text)))
+
+    try:
+        for label, text in first:
+            await start(packer.add(label, text))
+        first.clear()
+        async for label, text in sections:
+            await start(packer.add(label, text))
+        await start(packer.flush())
+        long_document_chunks.inc(len(tasks))
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def _reduce(partials: list) -> str:
+    """
+    Merge partial summaries in rounds of budget-sized groups until the
+    combined notes fit in one prompt.
+    """
+    sem = asyncio.Semaphore(MAP_CONCURRENCY)
+
+    async def merge(group):
+        if len(group) == 1:
+            return group[0]
+        async with sem:
+            return await _complete_cached("reduce", "\n\n".join(group), build_reduce_prompt(group))
+
+    while len(partials) > 1 and estimate_tokens("\n\n".join(partials)) > CHUNK_TOKENS:
+        groups = _group(partials, CHUNK_TOKENS)
+        if len(groups) == len(partials):
+            # Every partial is at the budget on its own; merge pairwise instead.
+            groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+        partials = await asyncio.gather(*(merge(group) for group in groups))
+    return "\n\n".join(partials)
+
+
+def _group(partials: list, max_tokens: int) -> list:
+    groups, current, size = [], [], 0
+    for text in partials:
+        tokens = estimate_tokens(text)
+        if current and size + tokens > max_tokens:
+            groups.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def condense_sections(sections) -> str:
+    """
+    Return text for the final summary prompt: the document itself when it is
+    short enough, otherwise the merged per-chunk clinical notes. `sections`
+    may be a list or an async iterable of (label, text); the latter is read
+    incrementally.
+    """
+    sections = _aiter(sections)
+    head, size = [], 0
+    async for label, text in sections:
+        head.append((label, text))
+        size += estimate_tokens(text)
+        if size > LONG_DOC_TOKENS:
+            return await _reduce(await _map(sections, head))
+    return "\n".join(t for _, t in head)
+
+
+async def _aiter(sections):
+    if hasattr(sections, "__aiter__"):
+        async for section in sections:
+            yield section
+    else:
+        for section in sections:
+            yield section
+
+
+async def summarize_document(sections: list, target_lang: str = "English") -> str:
+    """
+    Patient-friendly summary of (label, text) sections in the target language,
+    using chunked map-reduce for documents too long for a single prompt.
+    Extraction errors propagate; Cortex failures return SUMMARY_ERROR.
+    """
+    try:
+        text = await condense_sections(sections)
+    except ChunkSummaryError as e:
+        print(f"Error during chunked summarization: {e}")
+        return SUMMARY_ERROR
+    return await summarize_with_cache(text, target_lang)
+
+
+async def stream_document(sections: list, target_lang: str = "English"):
+    """
+    Streaming counterpart of summarize_document: long documents are condensed
+    first, then the final summary is streamed as (event, text) pairs.
+    """
+    try:
+        text = await condense_sections(sections)
+    except ChunkSummaryError as e:
+        print(f"Error during chunked summarization: {e}")
+        yield "error", SUMMARY_ERROR
+        return
+    async for event in stream_summary(text, target_lang):
+        yield event
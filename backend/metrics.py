@@ -0,0 +1,351 @@
+import contextvars
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally, deque
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+# Requests slower than this get their stage breakdown printed (and profiled
+# when the sampling profiler is running).
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "5"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """
+    Monotonic counter, one series per combination of label values.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def collect(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram in the Prometheus layout (cumulative buckets,
+    _sum and _count), one series per combination of label values.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count], sum, count
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self) -> list:
+        with self._lock:
+            items = [
+                (key, list(counts), total, count)
+                for key, (counts, total, count) in self._series.items()
+            ]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Counter or gauge read from existing stats when /metrics is scraped.
+    `read()` returns a number, or a dict of label-value tuples to numbers.
+    """
+
+    def __init__(self, name: str, kind: str, help: str, read, labelnames=()):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.read = read
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def collect(self) -> list:
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in values.items()]
+
+
+def render() -> str:
+    """
+    Every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in _registry:
+        try:
+            samples = metric.collect()
+        except Exception as e:
+            print(f"Could not collect {metric.name}: {e}")
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+stage_seconds = Histogram(
+    "medihelper_stage_duration_seconds", "Time spent in each pipeline stage.", ("stage",)
+)
+stage_errors = Counter(
+    "medihelper_stage_errors_total", "Pipeline stages that raised an error.", ("stage",)
+)
+request_seconds = Histogram(
+    "medihelper_http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status")
+)
+questions = Counter("medihelper_questions_total", "Questions answered by /api/ask.", ("endpoint",))
+serpapi_fallbacks = Counter(
+    "medihelper_serpapi_fallbacks_total", "Answers replaced by a SerpAPI search.", ("endpoint",)
+)
+transcriptions = Counter(
+    "medihelper_transcriptions_total", "Voice transcriptions by mode and outcome.", ("mode", "outcome")
+)
+long_document_chunks = Counter(
+    "medihelper_long_document_chunks_total", "Chunks summarized separately for long documents."
+)
+batch_queries = Counter(
+    "medihelper_batch_queries_total", "Multi-row Cortex queries sent for /api/summarize-batch."
+)
+
+# Stages recorded while handling the current request, for slow-request reports.
+_request_spans = contextvars.ContextVar("request_spans", default=None)
+_request_start = contextvars.ContextVar("request_start", default=None)
+
+
+def request_elapsed() -> float:
+    """
+    Seconds since the current request arrived, e.g. to time body upload
+    before the endpoint runs. 0 outside a request.
+    """
+    start = _request_start.get()
+    return time.perf_counter() - start if start is not None else 0.0
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    if not METRICS_ENABLED:
+        return
+    stage_seconds.observe(seconds, stage=stage)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time the enclosed block as `stage`, counting it as an error if it raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if METRICS_ENABLED:
+            stage_errors.inc(stage=stage)
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Records request latency by route template and collects the stages each
+    request went through, reporting the breakdown of slow requests.
+    """
+
+    def __init__(self, app, slow_seconds: float = SLOW_REQUEST_SECONDS):
+        self.app = app
+        self.slow_seconds = slow_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        spans = []
+        token = _request_spans.set(spans)
+        started_at = time.time()
+        start = time.perf_counter()
+        start_token = _request_start.set(start)
+
+        async def tracking_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tracking_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_spans.reset(token)
+            _request_start.reset(start_token)
+            # Route templates keep the label set bounded; unmatched paths share one.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_seconds.observe(elapsed, method=scope["method"], route=route, status=str(status))
+            if elapsed >= self.slow_seconds:
+                _report_slow(f"{scope['method']} {route}", elapsed, spans, started_at)
+
+
+def _report_slow(name: str, elapsed: float, spans: list, started_at: float) -> None:
+    totals, counts = {}, _Tally()
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+        counts[stage] += 1
+    # Concurrent stages (e.g. map-step Cortex calls) overlap, so totals can exceed the request time.
+    breakdown = ", ".join(
+        f"{stage} {seconds:.2f}s" + (f" (x{counts[stage]})" if counts[stage] > 1 else "")
+        for stage, seconds in sorted(totals.items(), key=lambda item: -item[1])
+    )
+    print(f"Slow request: {name} took {elapsed:.2f}s: {breakdown or 'no stages recorded'}")
+    if _profiler is not None:
+        path = _profiler.dump(name, started_at, started_at + elapsed)
+        if path:
+            print(f"Profile of slow request written to {path}")
+
+
+class SamplingProfiler:
+    """
+    Background thread that samples every thread's stack each `interval`
+    seconds and keeps the last `window` seconds of samples. When a request is
+    slow, the samples taken while it ran are written to PROFILE_DIR as
+    collapsed stacks (one "frame;frame;... count" line per stack), ready for
+    flamegraph tools. Samples cover the whole process, not just that request.
+    """
+
+    def __init__(self, interval: float = 0.02, window: float = 60.0, directory: str = "profiles"):
+        self.interval = interval
+        self.directory = directory
+        self._samples = deque(maxlen=max(1, int(window / interval)))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stacks.append(_collapse(names.get(ident, str(ident)), frame))
+            self._samples.append((time.time(), stacks))
+
+    def dump(self, name: str, start: float, end: float):
+        tally = _Tally()
+        for taken, stacks in list(self._samples):
+            if start <= taken <= end:
+                tally.update(stacks)
+        if not tally:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        slug = "".join(c if c.isalnum() else "_" for c in name).strip("_")
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(start)) + f".{int(start * 1000) % 1000:03d}"
+        path = os.path.join(self.directory, f"{stamp}-{slug}.folded")
+        with open(path, "w") as f:
+            for stack, count in tally.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def _collapse(thread_name: str, frame, limit: int = 40) -> str:
+    frames = []
+    while frame is not None and len(frames) < limit:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join([thread_name] + frames[::-1])
+
+
+_profiler = None
+
+
+def start_profiler(profiler: SamplingProfiler = None):
+    """
+    Start the slow-request sampling profiler if PROFILE_SLOW_REQUESTS is set
+    (or a profiler is passed in). Called from the app lifespan.
+    """
+    global _profiler
+    stop_profiler()
+    if profiler is None:
+        if os.getenv("PROFILE_SLOW_REQUESTS", "0") == "0":
+            return None
+        profiler = SamplingProfiler(
+            interval=float(os.getenv("PROFILE_INTERVAL_MS", "20")) / 1000,
+            window=float(os.getenv("PROFILE_WINDOW_SECONDS", "60")),
+            directory=os.getenv("PROFILE_DIR", "profiles"),
+        )
+    _profiler = profiler
+    _profiler.start()
+    return _profiler
+
+
+def stop_profiler() -> None:
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+        _profiler = None
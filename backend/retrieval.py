@@ -0,0 +1,149 @@
+import functools
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from chunking import chunk_sections, estimate_tokens
+from concurrency import env_int, run_extraction
+from extractor import split_text_sections
+from summary_cache import MemoryLRU, normalize_text
+
+# Notes up to this size are sent to Cortex whole; retrieval only pays off above it.
+RETRIEVAL_MIN_TOKENS = env_int("RETRIEVAL_MIN_TOKENS", 800)
+PASSAGE_TOKENS = env_int("RETRIEVAL_PASSAGE_TOKENS", 150)
+TOP_K = env_int("RETRIEVAL_TOP_K", 4)
+INDEX_CACHE_SIZE = env_int("RETRIEVAL_INDEX_CACHE_SIZE", 64)
+INDEX_CACHE_TTL = env_int("RETRIEVAL_INDEX_TTL", 3600)
+
+STOPWORDS = frozenset(
+    # English
+    "a an and are as at be been but by can did do does for from had has have how i "
+    "if in is it its me my no not of on or should so that the their there they this "
+    "to was we were what when where which who why will with you your "
+    # Spanish
+    "al como cómo con cual cuál cuando cuándo de del donde dónde el en es esta este la "
+    "las lo los más mi muy no o para pero por qué que se si su sus un una y "
+    # French
+    "au aux avec ce ces dans des du elle est et il je la le les leur mais ne ou où "
+    "pas pour qu qui sa se son sur un une vous "
+    # Hindi
+    "और का की के को क्या कि है हैं था थी थे तो ने पर में मैं मेरा यह वह से हो".split()
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _word_pattern():
+    # \w alone splits Devanagari and other Indic words at their vowel signs,
+    # which are combining marks rather than letters; let words run through the
+    # marks of the Basic Multilingual Plane (scanning all of Unicode is 20x slower).
+    marks = "".join(chr(c) for c in range(0x300, 0x10000) if unicodedata.category(chr(c)).startswith("M"))
+    return re.compile(rf"\w[\w{re.escape(marks)}]*")
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercase word terms in any script, without stopwords, with a plural "s"
+    dropped so "medications" matches "medication".
+    """
+    terms = []
+    for word in _word_pattern().findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the passages of one document.
+    """
+
+    def __init__(self, passages: list, k1: float = 1.5, b: float = 0.75):
+        self.passages = passages  # (label, text)
+        self.k1 = k1
+        self.b = b
+        self._tf = [Counter(tokenize(f"{label}\n{text}")) for label, text in passages]
+        self._lengths = [sum(tf.values()) for tf in self._tf]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0
+        df = Counter(term for tf in self._tf for term in tf)
+        n = len(passages)
+        self._idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def search(self, query: str, k: int = TOP_K) -> list:
+        """
+        Indices of the top `k` passages for `query`, best first. Passages that
+        share no term with the query are never returned.
+        """
+        terms = [t for t in set(tokenize(query)) if t in self._idf]
+        scores = []
+        for i, tf in enumerate(self._tf):
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / self._avg_length)
+            score = sum(
+                self._idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm) for t in terms if t in tf
+            )
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(key=lambda s: (-s[0], s[1]))
+        return [i for _, i in scores[:k]]
+
+
+def build_index(note: str) -> BM25Index:
+    return BM25Index(chunk_sections(split_text_sections(note), PASSAGE_TOKENS))
+
+
+def document_key(note: str) -> str:
+    return hashlib.sha256(normalize_text(note).encode("utf-8")).hexdigest()
+
+
+_indexes = MemoryLRU(INDEX_CACHE_SIZE, INDEX_CACHE_TTL)
+_stats = {"hits": 0, "misses": 0, "skipped": 0, "no_match": 0}
+
+
+async def get_index_async(note: str) -> BM25Index:
+    """
+    The note's index, built on the extraction pool on first use and then
+    shared by every question about the same note until it falls out of the LRU.
+    """
+    key = document_key(note)
+    index = _indexes.get(key)
+    if index is None:
+        _stats["misses"] += 1
+        index = await run_extraction(build_index, note)
+        _indexes.set(key, index)
+    else:
+        _stats["hits"] += 1
+    return index
+
+
+def _select(index: BM25Index, note: str, question: str) -> str:
+    hits = index.search(question, TOP_K)
+    if not hits:
+        # Nothing in the note matches the question; let Cortex see all of it.
+        _stats["no_match"] += 1
+        return note
+    # Back in document order, so the passages still read as one record.
+    return "\n\n".join(index.passages[i][1] for i in sorted(hits))
+
+
+async def relevant_context_async(note: str, question: str) -> str:
+    """
+    The part of `note` to send with `question`: the whole note when it is
+    short, otherwise its TOP_K best-matching passages.
+    """
+    if estimate_tokens(note) <= RETRIEVAL_MIN_TOKENS:
+        _stats["skipped"] += 1
+        return note
+    return _select(await get_index_async(note), note, question)
+
+
+def index_stats() -> dict:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "indexes": len(_indexes),
+        "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+    }
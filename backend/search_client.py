@@ -0,0 +1,234 @@
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+
+from concurrency import serpapi_limit
+from http_client import get_http_client
+from metrics import span
+from summary_cache import MemoryLRU, SQLiteStore, SummaryCache, make_key, normalize_text
+
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search")
+SERPAPI_ENGINE = "google"
+# Bump whenever format_search_results changes so cached answers are not reused.
+SEARCH_FORMAT_VERSION = "1"
+
+# Responses worth retrying: throttling and upstream hiccups.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class SearchError(Exception):
+    """SerpAPI returned no usable result."""
+
+
+class RateLimited(SearchError):
+    """The local SerpAPI quota would not allow a request soon enough."""
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache form of a question: lowercase words only, so "Can I take ibuprofen?"
+    and "can i take  Ibuprofen" share one entry.
+    """
+    return normalize_text(re.sub(r"[^\w\s]", " ", query.lower()))
+
+
+def format_search_results(results: dict) -> str:
+    """
+    Turn a SerpAPI response into a snippet + top 3 clickable links (HTML).
+    """
+    snippet = ""
+    if "answer_box" in results and "snippet" in results["answer_box"]:
+        snippet = results["answer_box"]["snippet"]
+    elif "organic_results" in results and results["organic_results"]:
+        snippet = results["organic_results"][0].get("snippet", "")
+
+    links = []
+    for result in results.get("organic_results", [])[:3]:
+        title = result.get("title", "Link")
+        link = result.get("link", "")
+        if title and link:
+            links.append(f'<a href="{link}" target="_blank" rel="noopener noreferrer">{title}</a>')
+
+    response = snippet.strip() if snippet else "Here are some helpful links:"
+    if links:
+        response += "<br><br><strong>Top Links:</strong><br>" + "<br>".join(links)
+
+    return response
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket holding up to `burst` tokens, refilled at `rate`
+    per second. Callers reserve a token and then sleep for the returned wait,
+    so queued requests are spread out instead of retrying in a burst.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float):
+        """
+        Take one token and return how long to wait before using it, or None
+        (taking nothing) if that would be longer than `max_wait` seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+class SearchClient:
+    """
+    SerpAPI client for the answer fallback: results are cached per normalized
+    query (memory LRU, optional SQLite), identical concurrent queries share one
+    request, requests are paced by a token bucket sized to the account quota,
+    and timeouts, 429s and 5xx responses are retried with jittered backoff.
+    """
+
+    def __init__(self, url: str = SERPAPI_URL, api_key: str = None, cache: SummaryCache = None,
+                 bucket: TokenBucket = None, timeout: float = 10.0, retries: int = 2,
+                 backoff: float = 0.5, max_wait: float = 5.0):
+        self.url = url
+        self.api_key = api_key
+        self.cache = cache if cache is not None else SummaryCache()
+        self.bucket = bucket if bucket is not None else TokenBucket(rate=1.0, burst=10)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+
+        self.requests = 0
+        self.retried = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "SearchClient":
+        ttl = float(os.getenv("SERPAPI_CACHE_TTL", "86400"))
+        memory = MemoryLRU(int(os.getenv("SERPAPI_CACHE_SIZE", "2048")), ttl)
+        path = os.getenv("SERPAPI_CACHE_DB")
+        return cls(
+            url=os.getenv("SERPAPI_URL", SERPAPI_URL),
+            api_key=os.getenv("SERPAPI_API_KEY"),
+            cache=SummaryCache(memory, SQLiteStore(path, ttl) if path else None),
+            bucket=TokenBucket(
+                rate=float(os.getenv("SERPAPI_RATE_PER_MINUTE", "60")) / 60,
+                burst=int(os.getenv("SERPAPI_BURST", "10")),
+            ),
+            timeout=float(os.getenv("SERPAPI_TIMEOUT", "10")),
+            retries=int(os.getenv("SERPAPI_RETRIES", "2")),
+            backoff=float(os.getenv("SERPAPI_BACKOFF", "0.5")),
+            max_wait=float(os.getenv("SERPAPI_MAX_WAIT", "5")),
+        )
+
+    def _key(self, query: str) -> str:
+        return make_key(normalize_query(query), "", SEARCH_FORMAT_VERSION, SERPAPI_ENGINE)
+
+    def _params(self, query: str) -> dict:
+        return {"engine": SERPAPI_ENGINE, "q": query, "api_key": self.api_key}
+
+    def _reserve(self) -> float:
+        wait = self.bucket.reserve(self.max_wait)
+        if wait is None:
+            self.rate_limited += 1
+            raise RateLimited("SerpAPI quota exhausted")
+        return wait
+
+    def _delay(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_wait)
+        return self.backoff * 2 ** attempt * (0.5 + random.random() / 2)
+
+    def _parse(self, res) -> str:
+        try:
+            if res.status_code != 200:
+                raise SearchError(f"SerpAPI returned HTTP {res.status_code}")
+            try:
+                body = res.json()
+            except ValueError as e:
+                raise SearchError("SerpAPI returned invalid JSON") from e
+            if "error" in body:
+                raise SearchError(body["error"])
+        except SearchError:
+            self.errors += 1
+            raise
+        return format_search_results(body)
+
+    async def search(self, query: str) -> str:
+        """
+        Formatted results for `query`, from the cache when possible.
+        Raises SearchError when no result could be fetched.
+        """
+        with span("serpapi.search"):
+            return await self.cache.get_or_compute(self._key(query), lambda: self._fetch(query))
+
+    async def _fetch(self, query: str) -> str:
+        for attempt in range(self.retries + 1):
+            await asyncio.sleep(self._reserve())
+            self.requests += 1
+            try:
+                async with serpapi_limit:
+                    with span("serpapi.request"):
+                        res = await get_http_client().get(
+                            self.url, params=self._params(query), timeout=self.timeout
+                        )
+            except Exception as e:
+                if attempt == self.retries:
+                    self.errors += 1
+                    raise SearchError(f"SerpAPI request failed: {e}") from e
+                delay = self._delay(attempt)
+            else:
+                if res.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return self._parse(res)
+                delay = self._delay(attempt, res.headers.get("Retry-After"))
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "cache": self.cache.stats(),
+        }
+
+    def close(self) -> None:
+        self.cache.close()
+
+
+_client = None
+
+
+def init_search_client(client: SearchClient = None) -> SearchClient:
+    global _client
+    if _client is not None:
+        _client.close()
+    _client = client if client is not None else SearchClient.from_env()
+    return _client
+
+
+def get_search_client() -> SearchClient:
+    global _client
+    if _client is None:
+        _client = SearchClient.from_env()
+    return _client
+
+
+def close_search_client() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,265 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from metrics import span
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up before the acquire timeout."""
+
+
+class PoolClosed(Exception):
+    """Raised when acquiring from a pool that has been shut down."""
+
+
+def connect_from_env():
+    """
+    Open a new Snowflake connection using the SNOWFLAKE_* environment variables.
+    """
+    # The connector takes a few hundred ms to import; only pay for it on first connect.
+    import snowflake.connector
+
+    return snowflake.connector.connect(
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+        database=os.getenv("SNOWFLAKE_DATABASE"),
+        schema=os.getenv("SNOWFLAKE_SCHEMA")
+    )
+
+
+class ConnectionPool:
+    """
+    Bounded pool of reusable Snowflake connections.
+
+    At most `max_size` connections are open at once; callers beyond that block
+    until one is released or `acquire_timeout` expires. Idle connections older
+    than `idle_timeout` are closed, and connections idle for longer than
+    `health_check_interval` are pinged with SELECT 1 before being handed out.
+    `connect` is any zero-argument callable returning a DB-API connection, so a
+    fake connector can be plugged in.
+    """
+
+    def __init__(self, connect=connect_from_env, max_size: int = 4,
+                 idle_timeout: float = 300.0, acquire_timeout: float = 30.0,
+                 health_check_interval: float = 60.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()  # (conn, last_used), most recently used on the right
+        self._size = 0        # open connections, idle + in use
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.evictions = 0
+        self.discarded = 0
+
+    @classmethod
+    def from_env(cls, connect=connect_from_env) -> "ConnectionPool":
+        return cls(
+            connect=connect,
+            max_size=int(os.getenv("SNOWFLAKE_POOL_SIZE", "4")),
+            idle_timeout=float(os.getenv("SNOWFLAKE_POOL_IDLE_TIMEOUT", "300")),
+            acquire_timeout=float(os.getenv("SNOWFLAKE_POOL_ACQUIRE_TIMEOUT", "30")),
+            health_check_interval=float(os.getenv("SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL", "60")),
+        )
+
+    def acquire(self):
+        """
+        Return a healthy connection, opening a new one if the pool has room.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            conn, last_used = self._reserve(deadline)
+            if conn is None:
+                try:
+                    with span("snowflake.connect"):
+                        return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            if self._is_healthy(conn, last_used):
+                return conn
+            self.release(conn, discard=True)
+
+    def release(self, conn, discard: bool = False) -> None:
+        """
+        Return a connection to the pool, or close it if `discard` is set.
+        """
+        with self._cond:
+            if self._closed or discard:
+                self._size -= 1
+                if discard:
+                    self.discarded += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+        if conn is not None:
+            _close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        with span("snowflake.acquire"):
+            conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, discard=_is_closed(conn))
+            raise
+        else:
+            self.release(conn)
+
+    def close(self) -> None:
+        """
+        Close every idle connection and refuse new acquires. Connections still
+        in use are closed as they are released.
+        """
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "evictions": self.evictions,
+                "discarded": self.discarded,
+            }
+
+    def _reserve(self, deadline: float):
+        """
+        Pop an idle connection, or reserve a slot for a new one (returns None).
+        """
+        waited = False
+        stale = []
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolClosed("Snowflake connection pool is closed")
+                    stale.extend(self._evict_idle_locked())
+                    if self._idle:
+                        self.hits += 1
+                        return self._idle.pop()
+                    if self._size < self.max_size:
+                        self._size += 1
+                        self.misses += 1
+                        return None, None
+                    if not waited:
+                        self.waits += 1
+                        waited = True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No Snowflake connection available after {self.acquire_timeout}s"
+                        )
+                    self._cond.wait(remaining)
+        finally:
+            for conn in stale:
+                _close_quietly(conn)
+
+    def _evict_idle_locked(self) -> list:
+        # Oldest connections sit on the left of the deque.
+        cutoff = time.monotonic() - self.idle_timeout
+        stale = []
+        while self._idle and self._idle[0][1] < cutoff:
+            stale.append(self._idle.popleft()[0])
+        self._size -= len(stale)
+        self.evictions += len(stale)
+        return stale
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if _is_closed(conn):
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception as e:
+            print(f"Discarding unhealthy Snowflake connection: {e}")
+            return False
+
+
+def _is_closed(conn) -> bool:
+    is_closed = getattr(conn, "is_closed", None)
+    try:
+        return bool(is_closed()) if callable(is_closed) else False
+    except Exception:
+        return True
+
+
+def _close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except Exception as e:
+        print(f"Error closing Snowflake connection: {e}")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_pool(pool: ConnectionPool = None) -> ConnectionPool:
+    """
+    Install the process-wide pool (built from the environment if not given).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = pool if pool is not None else ConnectionPool.from_env()
+        return _pool
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Return the process-wide pool, creating it on first use outside the app.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool.from_env()
+        return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -1,16 +1,62 @@
-import os
 import re
-import requests
-import snowflake.connector
-from dotenv import load_dotenv
+from cortex import complete, stream_complete
+from concurrency import run_snowflake
+from metrics import questions, serpapi_fallbacks
+from retrieval import relevant_context_async
+from search_client import get_search_client
+from summary_cache import get_cache, make_key
 
-# Load environment variables
-load_dotenv()
+SUMMARY_MODEL = "llama3.1-8b"
+# Bump whenever build_multilingual_prompt changes so cached summaries are not reused.
+PROMPT_VERSION = "1"
+
+SUMMARY_ERROR = "An error occurred while summarizing the document."
+NO_SUMMARY = "No summary generated."
 
 def clean_summary(text: str) -> str:
     """Remove markdown-like bold markers from summary."""
     return re.sub(r"\*\*(.*?)\*\*", r"\1", text)
 
+class BoldStripper:
+    """
+    Incremental clean_summary for streamed text. Bold pairs never span lines,
+    so text is released as soon as no open "**" could still change it; an
+    unclosed marker is held back until its closing pair or the end of line.
+    """
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        self._pending += chunk
+        out = []
+        while "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            out.append(clean_summary(line) + "\n")
+
+        # Same leftmost, non-greedy matching as the regex, over a partial line.
+        line, i = self._pending, 0
+        while True:
+            start = line.find("**", i)
+            if start == -1:
+                # A trailing "*" may still become the start of a marker.
+                end = len(line) - 1 if line[i:].endswith("*") else len(line)
+                out.append(line[i:end])
+                self._pending = line[end:]
+                break
+            close = line.find("**", start + 2)
+            if close == -1:
+                out.append(line[i:start])
+                self._pending = line[start:]
+                break
+            out.append(line[i:start] + line[start + 2:close])
+            i = close + 2
+        return "".join(out)
+
+    def flush(self) -> str:
+        rest, self._pending = clean_summary(self._pending), ""
+        return rest
+
 def build_multilingual_prompt(text: str, target_lang: str) -> str:
     if target_lang.lower() == "hindi":
         return (
@@ -39,81 +85,55 @@ def summarize_with_snowflake(text: str, target_lang: str = "English") -> str:
     """
     Summarizes the given clinical note using Snowflake Cortex COMPLETE().
     """
-    conn = snowflake.connector.connect(
-        user=os.getenv("SNOWFLAKE_USER"),
-        password=os.getenv("SNOWFLAKE_PASSWORD"),
-        account=os.getenv("SNOWFLAKE_ACCOUNT"),
-        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-        database=os.getenv("SNOWFLAKE_DATABASE"),
-        schema=os.getenv("SNOWFLAKE_SCHEMA")
-    )
-    cursor = conn.cursor()
-
     try:
         prompt = build_multilingual_prompt(text, target_lang)
-
-        query = f"""
-        SELECT snowflake.cortex.complete(
-            'llama3.1-8b',
-            $$ {prompt} $$
-        ) AS summary;
-        """
-        cursor.execute(query)
-        row = cursor.fetchone()
-        raw_summary = row[0] if row and row[0] else "No summary generated."
+        raw_summary = complete(prompt, SUMMARY_MODEL) or NO_SUMMARY
         return clean_summary(raw_summary).strip()
 
     except Exception as e:
         print(f"Error during summarization: {e}")
-        return "An error occurred while summarizing the document."
+        return SUMMARY_ERROR
 
-    finally:
-        cursor.close()
-        conn.close()
+def is_cacheable_summary(summary: str) -> bool:
+    return bool(summary) and summary not in (SUMMARY_ERROR, NO_SUMMARY)
 
-def search_google_fallback(query: str) -> str:
+async def summarize_with_cache(text: str, target_lang: str = "English") -> str:
     """
-    Uses SerpAPI to search Google and return a snippet + top 3 clickable links (HTML).
+    Cached, non-blocking summarize_with_snowflake. Identical notes (after
+    whitespace normalization) in the same language reuse the stored summary,
+    and identical requests already in flight share one Cortex call.
     """
-    params = {
-        "engine": "google",
-        "q": query,
-        "api_key": os.getenv("SERPAPI_API_KEY")
-    }
-
-    try:
-        res = requests.get("https://serpapi.com/search", params=params)
-        results = res.json()
-
-        snippet = ""
-        if "answer_box" in results and "snippet" in results["answer_box"]:
-            snippet = results["answer_box"]["snippet"]
-        elif "organic_results" in results and results["organic_results"]:
-            snippet = results["organic_results"][0].get("snippet", "")
-
-        links = []
-        for result in results.get("organic_results", [])[:3]:
-            title = result.get("title", "Link")
-            link = result.get("link", "")
-            if title and link:
-                links.append(f'<a href="{link}" target="_blank" rel="noopener noreferrer">{title}</a>')
+    key = make_key(text, target_lang, PROMPT_VERSION, SUMMARY_MODEL)
+    return await get_cache().get_or_compute(
+        key,
+        lambda: run_snowflake(summarize_with_snowflake, text, target_lang),
+        cacheable=is_cacheable_summary,
+    )
 
-        response = snippet.strip() if snippet else "Here are some helpful links:"
-        if links:
-            response += "<br><br><strong>Top Links:</strong><br>" + "<br>".join(links)
+BAD_PHRASES = [
+    "webmd", "check online", "i'm not sure",
+    "consult your doctor", "not provided", "not mentioned",
+    "john's wort", "over the counter", "drug interaction", "interact"
+]
 
-        return response
+async def search_google_fallback_async(query: str) -> str:
+    """
+    Uses SerpAPI to search Google and return a snippet + top 3 clickable links
+    (HTML). Repeated and concurrent identical questions are answered from the
+    search client's cache.
+    """
+    try:
+        return await get_search_client().search(query)
 
     except Exception as e:
         print("SerpAPI fallback failed:", e)
         return "Google search failed."
 
-def ask_with_snowflake(note: str, question: str) -> str:
-    """
-    Answers a question based on the given clinical summary using Snowflake Cortex.
-    Falls back to SerpAPI if the answer is vague, irrelevant, or hallucinated.
-    """
-    prompt = (
+def is_vague_answer(answer: str) -> bool:
+    return not answer or any(phrase in answer.lower() for phrase in BAD_PHRASES)
+
+def build_qa_prompt(note: str, question: str) -> str:
+    return (
         "You are a helpful and cautious medical assistant. "
         "You should prioritize answering from the clinical summary below. "
         "If the answer is clearly stated in the summary, extract it. "
@@ -123,43 +143,110 @@ def ask_with_snowflake(note: str, question: str) -> str:
         f"User Question:\n{question}"
     )
 
-    conn = snowflake.connector.connect(
-        user=os.getenv("SNOWFLAKE_USER"),
-        password=os.getenv("SNOWFLAKE_PASSWORD"),
-        account=os.getenv("SNOWFLAKE_ACCOUNT"),
-        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-        database=os.getenv("SNOWFLAKE_DATABASE"),
-        schema=os.getenv("SNOWFLAKE_SCHEMA")
-    )
-    cursor = conn.cursor()
+def answer_from_snowflake(note: str, question: str) -> str:
+    """
+    Asks Cortex a question about the clinical summary. Returns "" on failure.
+    """
+    try:
+        return complete(build_qa_prompt(note, question), SUMMARY_MODEL).strip()
 
+    except Exception as e:
+        print(f"Error during LLM Q&A: {e}")
+        return ""
+
+async def ask_with_snowflake_async(note: str, question: str) -> str:
+    """
+    Answers a question based on the given clinical summary using Snowflake Cortex.
+    Long summaries are narrowed to the passages relevant to the question.
+    Falls back to SerpAPI if the answer is vague, irrelevant, or hallucinated.
+    Cortex runs on the Snowflake thread pool, so the event loop stays free.
+    """
+    context = await relevant_context_async(note, question)
+    answer = await run_snowflake(answer_from_snowflake, context, question)
+    questions.inc(endpoint="ask")
+    if is_vague_answer(answer):
+        print("Falling back to SerpAPI...")
+        serpapi_fallbacks.inc(endpoint="ask")
+        return await search_google_fallback_async(question)
+
+    return answer
+
+async def stream_summary(text: str, target_lang: str = "English"):
+    """
+    Yields (event, text) pairs while Cortex writes the summary: "token" for
+    each cleaned piece of text and "error" if generation fails. A cached
+    summary is sent as a single token; a completed one is added to the cache.
+    Identical requests arriving meanwhile wait for this one's summary.
+    """
+    cache = get_cache()
+    key = make_key(text, target_lang, PROMPT_VERSION, SUMMARY_MODEL)
+    cached = await cache.lookup(key)
+    if cached is not None:
+        yield "token", cached
+        return
+
+    claim = cache.claim(key)
+    summary = None
+    stripper = BoldStripper()
+    parts = []
+    try:
+        try:
+            async for chunk in stream_complete(build_multilingual_prompt(text, target_lang), SUMMARY_MODEL):
+                piece = stripper.feed(chunk)
+                if not parts:
+                    # Match summarize_with_snowflake's .strip() at the start of the text.
+                    piece = piece.lstrip()
+                if piece:
+                    parts.append(piece)
+                    yield "token", piece
+            piece = stripper.flush()
+            if not parts:
+                piece = piece.lstrip()
+            if piece:
+                parts.append(piece)
+                yield "token", piece
+
+        except Exception as e:
+            print(f"Error during summarization: {e}")
+            yield "error", SUMMARY_ERROR
+            return
+
+        summary = "".join(parts).strip()
+        if not summary:
+            yield "token", NO_SUMMARY
+        elif is_cacheable_summary(summary):
+            await cache.set(key, summary)
+        else:
+            summary = None
+    finally:
+        # Waiting requests get the summary, or compute their own if this one failed or was dropped.
+        cache.release(key, claim, summary or None)
+
+async def stream_answer(note: str, question: str):
+    """
+    Yields (event, text) pairs for a streamed answer: "token" for each piece
+    of the Cortex answer, then "replace" with the SerpAPI result if the answer
+    turns out vague. Generation stops as soon as a fallback phrase appears.
+    """
+    answer = ""
+    context = await relevant_context_async(note, question)
+    stream = stream_complete(build_qa_prompt(context, question), SUMMARY_MODEL)
     try:
-        query = f"""
-        SELECT snowflake.cortex.complete(
-            'llama3.1-8b',
-            $$ {prompt} $$
-        ) AS answer;
-        """
-        cursor.execute(query)
-        row = cursor.fetchone()
-        answer = row[0].strip() if row and row[0] else ""
-
-        bad_phrases = [
-            "webmd", "check online", "i'm not sure",
-            "consult your doctor", "not provided", "not mentioned",
-            "john's wort", "over the counter", "drug interaction", "interact"
-        ]
-
-        if not answer or any(phrase in answer.lower() for phrase in bad_phrases):
-            print("Falling back to SerpAPI...")
-            return search_google_fallback(question)
-
-        return answer
+        async for chunk in stream:
+            answer += chunk
+            if any(phrase in answer.lower() for phrase in BAD_PHRASES):
+                break
+            yield "token", chunk
 
     except Exception as e:
         print(f"Error during LLM Q&A: {e}")
-        return search_google_fallback(question)
+        answer = ""
 
     finally:
-        cursor.close()
-        conn.close()
+        await stream.aclose()
+
+    questions.inc(endpoint="ask_stream")
+    if is_vague_answer(answer.strip()):
+        print("Falling back to SerpAPI...")
+        serpapi_fallbacks.inc(endpoint="ask_stream")
+        yield "replace", await search_google_fallback_async(question)
@@ -0,0 +1,262 @@
+import asyncio
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for hashing: NFC unicode with all whitespace runs
+    collapsed, so re-extracted or re-pasted copies of a note share one key.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_key(text: str, target_lang: str, prompt_version: str, model: str) -> str:
+    digest = hashlib.sha256()
+    for part in (normalize_text(text), target_lang.strip().lower(), prompt_version, model):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class MemoryLRU:
+    """
+    Thread-safe in-process LRU where every entry expires after `ttl` seconds.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, expires_at: float = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at or time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """
+    On-disk tier that survives restarts. Expired rows are ignored on read and
+    purged when the store is opened.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return row
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class SummaryCache:
+    """
+    Two-tier cache (memory LRU, optional SQLite) with single-flight
+    deduplication: concurrent requests for the same key share one computation.
+    """
+
+    def __init__(self, memory: MemoryLRU = None, disk: SQLiteStore = None):
+        self.memory = memory if memory is not None else MemoryLRU()
+        self.disk = disk
+        self._inflight = {}  # key -> asyncio.Future
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stores = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "SummaryCache":
+        ttl = float(os.getenv("SUMMARY_CACHE_TTL", "86400"))
+        memory = MemoryLRU(int(os.getenv("SUMMARY_CACHE_SIZE", "1024")), ttl)
+        path = os.getenv("SUMMARY_CACHE_DB")
+        return cls(memory, SQLiteStore(path, ttl) if path else None)
+
+    async def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            row = await asyncio.to_thread(self.disk.get, key)
+            if row is not None:
+                self.disk_hits += 1
+                self.memory.set(key, row[0], row[1])
+                return row[0]
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+        self.stores += 1
+
+    async def get_or_compute(self, key: str, compute, cacheable=lambda value: True):
+        """
+        Return the cached value for `key`, or await `compute()` once and store
+        its result if `cacheable(result)` is true. The computation runs in its
+        own task, so a caller that is cancelled (e.g. a client disconnecting)
+        does not cancel it for the other callers waiting on the same key.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            value = await asyncio.shield(pending)
+            if value is not None:
+                self.coalesced += 1
+                return value
+            # A streamed computation gave up (see claim()); compute it here.
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._compute(key, compute, cacheable))
+        self._inflight[key] = task
+        task.add_done_callback(functools.partial(self._finished, key))
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute, cacheable):
+        value = await compute()
+        if cacheable(value):
+            await self.set(key, value)
+        else:
+            self.rejected += 1
+        return value
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every caller has gone away.
+        if not task.cancelled():
+            task.exception()
+
+    async def lookup(self, key: str):
+        """
+        get() for callers that compute a missing value themselves, e.g. by
+        streaming it: waits for a computation of `key` already in flight and
+        counts a miss when there is nothing to wait for.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                value = await asyncio.shield(pending)
+            except Exception:
+                value = None
+            if value is not None:
+                self.coalesced += 1
+                return value
+        self.misses += 1
+        return None
+
+    def claim(self, key: str) -> asyncio.Future:
+        """
+        Mark `key` as being computed by the caller after a lookup() miss, so
+        other requests for it wait instead of computing it again. The caller
+        must hand the value, or None if it gave up, to release().
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._inflight.setdefault(key, future)
+        return future
+
+    def release(self, key: str, future: asyncio.Future, value) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.done():
+            future.set_result(value)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses + self.coalesced
+        hits = self.memory_hits + self.disk_hits + self.coalesced
+        return {
+            "entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "stores": self.stores,
+            "rejected": self.rejected,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+_cache = None
+
+
+def init_cache(cache: SummaryCache = None) -> SummaryCache:
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = cache if cache is not None else SummaryCache.from_env()
+    return _cache
+
+
+def get_cache() -> SummaryCache:
+    global _cache
+    if _cache is None:
+        _cache = SummaryCache.from_env()
+    return _cache
+
+
+def close_cache() -> None:
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
@@ -1,3 +1,7 @@
+from dotenv import load_dotenv
+
+load_dotenv()
+
 from summarizer import summarize_with_snowflake
 
 if __name__ == "__main__":
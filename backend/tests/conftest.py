@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Never reach for real Snowflake when a test imports the app.
+os.environ.setdefault("STARTUP_WARMUP", "none")
+
+from concurrency import LIMITERS  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters():
+    # Each test runs its own event loop; limiter semaphores must not outlive it.
+    for limiter in LIMITERS:
+        limiter.reset()
+    yield
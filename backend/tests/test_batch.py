@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import batch
+import summary_cache
+from batch import BatchClosed, PromptBatcher
+from summary_cache import SummaryCache
+
+
+def test_prompts_share_one_query(monkeypatch):
+    queries = []
+
+    async def fake_run_snowflake(fn, prompts, model):
+        queries.append(prompts)
+        return [f"summary of {p}" for p in prompts]
+
+    monkeypatch.setattr(batch, "run_snowflake", fake_run_snowflake)
+    batcher = PromptBatcher(max_size=3, window=0.01)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(p) for p in ("a", "b", "c", "d")))
+
+    assert asyncio.run(run()) == [f"summary of {p}" for p in "abcd"]
+    assert queries == [["a", "b", "c"], ["d"]]
+
+
+def test_close_cancels_queries_and_fails_waiting_prompts(monkeypatch):
+    started = []
+
+    async def slow_run_snowflake(fn, prompts, model):
+        started.append(prompts)
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(batch, "run_snowflake", slow_run_snowflake)
+    batcher = PromptBatcher(max_size=1, window=0.01)
+
+    async def run():
+        pending = [asyncio.ensure_future(batcher.submit(p)) for p in ("a", "b")]
+        await asyncio.sleep(0.01)
+        await batcher.close()
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        with pytest.raises(BatchClosed):
+            await batcher.submit("c")
+        return results
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=2))
+    assert all(isinstance(r, BatchClosed) for r in results)
+    assert started == [["a"], ["b"]]
+    assert not batcher._tasks
+
+
+def test_cancelled_batch_does_not_fail_batch_sharing_its_note(monkeypatch):
+    calls = []
+
+    async def fake_run_snowflake(fn, prompts, model):
+        calls.append(prompts)
+        if len(calls) == 1:
+            await asyncio.sleep(10)  # batch A's query, cancelled below
+        return ["Summary of the note." for _ in prompts]
+
+    monkeypatch.setattr(batch, "run_snowflake", fake_run_snowflake)
+    monkeypatch.setattr(summary_cache, "_cache", SummaryCache())
+    items = [("note.txt", ("text", "Patient seen for a follow-up visit."))]
+
+    async def collect():
+        return [result async for result in batch.summarize_batch(items)]
+
+    async def run():
+        first = asyncio.ensure_future(collect())
+        await asyncio.sleep(0.1)  # A holds the note's single-flight slot
+        second = asyncio.ensure_future(collect())
+        await asyncio.sleep(0.01)  # B waits on A's computation
+        first.cancel()
+        return await second
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=2))
+    assert results == [{"index": 0, "name": "note.txt", "status": "ok", "summary": "Summary of the note."}]
+    assert len(calls) == 2
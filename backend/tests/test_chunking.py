@@ -0,0 +1,52 @@
+import chunking
+from chunking import CHARS_PER_TOKEN, ChunkPacker, _split_oversized, chunk_sections, estimate_tokens
+
+
+def _pack(packer, sections):
+    chunks = [chunk for label, text in sections for chunk in packer.add(label, text)]
+    return chunks + packer.flush()
+
+
+def test_packer_fills_chunks_up_to_the_budget_without_anchors(monkeypatch):
+    monkeypatch.setattr(chunking, "_is_anchor", lambda text, max_tokens: False)
+    sections = [(f"S{i}", f"{i}" * 16) for i in range(1, 6)]  # 5 tokens each
+    assert _pack(ChunkPacker(10), sections) == [
+        ("S1 to S2", "1" * 16 + "\n\n" + "2" * 16),
+        ("S3 to S4", "3" * 16 + "\n\n" + "4" * 16),
+        ("S5", "5" * 16),
+    ]
+
+
+def test_anchor_ends_a_chunk_once_it_is_a_quarter_full(monkeypatch):
+    monkeypatch.setattr(chunking, "_is_anchor", lambda text, max_tokens: text.startswith("A"))
+    sections = [("S1", "A" * 16), ("S2", "x" * 16), ("S3", "A" * 16), ("S4", "x" * 16)]
+    # S1 alone is under a quarter of 40 tokens, so only S3 ends a chunk.
+    assert [label for label, _ in _pack(ChunkPacker(40), sections)] == ["S1 to S3", "S4"]
+
+
+def test_chunks_stay_within_budget_and_keep_every_section():
+    sections = [(f"Page {i}", f"Visit {i}." + " Blood pressure stable." * (i * 7 % 30 + 1)) for i in range(1, 80)]
+    chunks = chunk_sections(sections, 200)
+    assert all(estimate_tokens(text) <= 200 for _, text in chunks)
+    assert "\n\n".join(text for _, text in chunks) == "\n\n".join(text for _, text in sections)
+
+
+def test_oversized_section_is_split_into_labelled_parts():
+    text = "\n\n".join(f"Paragraph {i}. " + "Aspirin daily. " * 20 for i in range(6))
+    chunks = chunk_sections([("Medications", text)], 150)
+    assert [label for label, _ in chunks] == [
+        f"Medications (part {i} of {len(chunks)})" for i in range(1, len(chunks) + 1)
+    ]
+    assert all(estimate_tokens(part) <= 150 for _, part in chunks)
+
+
+def test_split_oversized_prefers_paragraphs_then_sentences():
+    paragraphs = ["First paragraph.", "Second paragraph.", "Third paragraph."]
+    assert _split_oversized("\n\n".join(paragraphs), 5) == paragraphs
+    assert _split_oversized("One sentence here. Another one here.", 5) == ["One sentence here.", "Another one here."]
+
+
+def test_split_oversized_hard_wraps_unbroken_text():
+    parts = _split_oversized("x" * 50, 3)
+    assert parts == ["x" * 12, "x" * 12, "x" * 12, "x" * 12, "xx"]
+    assert all(len(part) <= 3 * CHARS_PER_TOKEN for part in parts)
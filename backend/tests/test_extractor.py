@@ -0,0 +1,85 @@
+import docx
+import pytest
+
+from extractor import _docx_window, _txt_window, extract_sections, extract_sections_window, split_text_sections
+
+
+@pytest.fixture
+def record_docx(tmp_path):
+    doc = docx.Document()
+    doc.add_heading("Discharge Summary", 0)
+    doc.add_paragraph("Admitted with chest pain.")
+    doc.add_heading("Medications", 1)
+    doc.add_paragraph("Aspirin 81 mg daily")
+    doc.add_paragraph("Atorvastatin 40 mg", style="List Bullet")
+    doc.add_heading("Follow-up", 2)
+    doc.add_paragraph("Cardiology in 2 weeks.")
+    path = tmp_path / "record.docx"
+    doc.save(path)
+    return str(path)
+
+
+def test_docx_sections_split_on_title_and_headings(record_docx):
+    assert extract_sections(record_docx) == [
+        ("Discharge Summary", "Discharge Summary\nAdmitted with chest pain."),
+        ("Medications", "Medications\nAspirin 81 mg daily\nAtorvastatin 40 mg"),
+        ("Follow-up", "Follow-up\nCardiology in 2 weeks."),
+    ]
+
+
+def test_text_sections_split_on_heading_lines():
+    text = "Seen today.\nAssessment:\nStable angina.\nPlan\nDISCHARGE MEDICATIONS\nAspirin."
+    assert split_text_sections(text) == [
+        ("Note", "Seen today."),
+        ("Assessment", "Assessment:\nStable angina.\nPlan"),
+        ("DISCHARGE MEDICATIONS", "DISCHARGE MEDICATIONS\nAspirin."),
+    ]
+
+
+def _windows(path, max_chars):
+    sections, start, label = [], 0, None
+    while start is not None:
+        window, start, label = extract_sections_window(path, start, max_chars, label)
+        sections.extend(window)
+    return sections
+
+
+def test_txt_window_returns_byte_offset_of_next_line(tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_bytes("Température: 38 °C\r\nनाड़ी 80\nEnd".encode("utf-8"))
+    lines, offset = _txt_window(str(path), 0, 5)
+    assert lines == ["Température: 38 °C"]
+    assert offset == len("Température: 38 °C\r\n".encode("utf-8"))
+    assert _txt_window(str(path), offset, 5) == (["नाड़ी 80"], offset + len("नाड़ी 80\n".encode("utf-8")))
+    assert _txt_window(str(path), offset, 1000) == (["नाड़ी 80", "End"], None)
+
+
+def test_txt_windows_continue_the_section_they_start_in(tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_text("ASSESSMENT:\nStable angina.\nNo chest pain today.\nPLAN:\nAspirin daily.\n")
+    assert _windows(str(path), 20) == [
+        ("ASSESSMENT", "ASSESSMENT:\nStable angina."),
+        ("ASSESSMENT (continued)", "No chest pain today."),
+        ("PLAN", "PLAN:\nAspirin daily."),
+    ]
+    assert _windows(str(path), 1000) == extract_sections(str(path))
+
+
+def test_docx_window_stops_after_max_chars(record_docx):
+    paragraphs, next_start = _docx_window(record_docx, 0, 30)
+    assert paragraphs == [("Title", "Discharge Summary"), ("Normal", "Admitted with chest pain.")]
+    assert next_start == 2
+    paragraphs, next_start = _docx_window(record_docx, 5, 1000)
+    assert paragraphs == [("Heading 2", "Follow-up"), ("Normal", "Cardiology in 2 weeks.")]
+    assert next_start is None
+
+
+def test_docx_windows_match_whole_document(record_docx):
+    assert _windows(record_docx, 1000) == extract_sections(record_docx)
+    assert _windows(record_docx, 20) == [
+        ("Discharge Summary", "Discharge Summary\nAdmitted with chest pain."),
+        ("Medications", "Medications\nAspirin 81 mg daily"),
+        ("Medications (continued)", "Atorvastatin 40 mg"),
+        ("Follow-up", "Follow-up"),
+        ("Follow-up (continued)", "Cardiology in 2 weeks."),
+    ]
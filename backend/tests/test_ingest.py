@@ -0,0 +1,43 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from ingest import MaxUploadSizeMiddleware
+
+MB = 1024 * 1024
+
+
+def _client(max_bytes: int = MB) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(MaxUploadSizeMiddleware, max_bytes=max_bytes)
+
+    @app.post("/api/upload")
+    @app.post("/other")
+    async def upload(request: Request):
+        return {"received": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_bodies_within_the_limit_pass_through():
+    assert _client().post("/api/upload", content=b"x" * MB).json() == {"received": MB}
+
+
+def test_declared_length_over_the_limit_is_rejected_up_front():
+    res = _client().post("/api/upload", content=b"x" * (MB + 1))
+    assert res.status_code == 413
+    assert res.json() == {"detail": "Upload exceeds the 1 MB limit"}
+
+
+def test_chunked_body_is_rejected_once_it_passes_the_limit():
+    def body():
+        # A generator body is sent chunked, without a Content-Length header.
+        for _ in range(5):
+            yield b"x" * (MB // 2)
+
+    res = _client().post("/api/upload", content=body())
+    assert res.status_code == 413
+    assert res.json() == {"detail": "Upload exceeds the 1 MB limit"}
+
+
+def test_paths_outside_the_prefix_are_not_limited():
+    assert _client().post("/other", content=b"x" * 2 * MB).json() == {"received": 2 * MB}
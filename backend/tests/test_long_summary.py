@@ -0,0 +1,75 @@
+import asyncio
+import random
+
+import long_summary
+import summary_cache
+from summary_cache import SummaryCache
+
+WORDS = "patient reports chest pain stable angina aspirin daily blood pressure follow-up visit".split()
+
+
+def _pages(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        (f"Page {i}", " ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 180))))
+        for i in range(1, count + 1)
+    ]
+
+
+def test_editing_one_page_resummarizes_one_chunk(monkeypatch):
+    map_calls = []
+
+    async def fake_run_snowflake(fn, prompt, model):
+        if prompt.startswith("The following is one excerpt"):
+            map_calls.append(prompt)
+        return f"notes {len(prompt)}"
+
+    monkeypatch.setattr(long_summary, "run_snowflake", fake_run_snowflake)
+    monkeypatch.setattr(summary_cache, "_cache", SummaryCache())
+    pages = _pages(60)
+    edited = list(pages)
+    # Long enough that greedy packing would push every later page into a different chunk.
+    edited[4] = (edited[4][0], edited[4][1] + " Started metoprolol 25 mg twice daily." * 12)
+
+    asyncio.run(long_summary.condense_sections(pages))
+    first = len(map_calls)
+    map_calls.clear()
+    asyncio.run(long_summary.condense_sections(edited))
+
+    assert first >= 5
+    assert len(map_calls) == 1
+    assert "metoprolol" in map_calls[0]
+
+
+def test_group_packs_partials_up_to_the_budget():
+    partials = ["a" * 36, "b" * 36, "c" * 36, "d" * 76]  # 10, 10, 10 and 20 tokens
+    assert long_summary._group(partials, 25) == [["a" * 36, "b" * 36], ["c" * 36], ["d" * 76]]
+
+
+def _merge_calls(monkeypatch):
+    merged = []
+
+    async def fake_run_snowflake(fn, prompt, model):
+        notes = prompt.split("\n\n")[1:]
+        merged.append([note[0] for note in notes])
+        return "+".join(note[0] for note in notes)
+
+    monkeypatch.setattr(long_summary, "run_snowflake", fake_run_snowflake)
+    monkeypatch.setattr(long_summary, "CHUNK_TOKENS", 25)
+    monkeypatch.setattr(summary_cache, "_cache", SummaryCache())
+    return merged
+
+
+def test_reduce_merges_budget_sized_groups_until_notes_fit(monkeypatch):
+    merged = _merge_calls(monkeypatch)
+    partials = [letter * 36 for letter in "abcdef"]  # 10 tokens each, 60 in total
+    assert asyncio.run(long_summary._reduce(partials)) == "a+b\n\nc+d\n\ne+f"
+    assert merged == [["a", "b"], ["c", "d"], ["e", "f"]]
+
+
+def test_reduce_merges_pairwise_when_every_partial_fills_the_budget(monkeypatch):
+    merged = _merge_calls(monkeypatch)
+    partials = [letter * 120 for letter in "abc"]  # 31 tokens each
+    # The second round still does not fit: "a+b" and the "c" note are merged pairwise again.
+    assert asyncio.run(long_summary._reduce(partials)) == "a+c"
+    assert merged == [["a", "b"], ["a", "c"]]
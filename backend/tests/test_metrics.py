@@ -0,0 +1,63 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import metrics
+from metrics import Counter, Histogram, MetricsMiddleware, render
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # Metrics created by a test register here instead of alongside the app's.
+    monkeypatch.setattr(metrics, "_registry", [])
+    return metrics._registry
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive(registry):
+    histogram = Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 3):
+        histogram.observe(value, stage="parse")
+    assert histogram.collect() == [
+        'latency_seconds_bucket{stage="parse",le="0.01"} 2',
+        'latency_seconds_bucket{stage="parse",le="0.1"} 3',
+        'latency_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'latency_seconds_sum{stage="parse"} 3.065',
+        'latency_seconds_count{stage="parse"} 4',
+    ]
+
+
+def test_render_writes_help_type_and_escaped_labels(registry):
+    errors = Counter("errors_total", "Errors.", ("stage",))
+    errors.inc(stage='say "hi"\nback\\slash')
+    Histogram("empty_seconds", "Nothing observed yet.")
+    assert render() == (
+        "# HELP errors_total Errors.\n"
+        "# TYPE errors_total counter\n"
+        'errors_total{stage="say \\"hi\\"\\nback\\\\slash"} 1\n'
+        "# HELP empty_seconds Nothing observed yet.\n"
+        "# TYPE empty_seconds histogram\n"
+    )
+
+
+def test_middleware_labels_requests_by_route_template(registry, monkeypatch):
+    requests = Histogram("requests_seconds", "Requests.", ("method", "route", "status"))
+    monkeypatch.setattr(metrics, "request_seconds", requests)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/api/notes/{note_id}")
+    async def note(note_id: int):
+        return {"id": note_id}
+
+    client = TestClient(app)
+    client.get("/api/notes/1")
+    client.get("/api/notes/2")
+    client.get("/api/notes/x")
+    client.get("/missing")
+
+    counts = [line for line in requests.collect() if line.startswith("requests_seconds_count")]
+    assert sorted(counts) == [
+        'requests_seconds_count{method="GET",route="/api/notes/{note_id}",status="200"} 2',
+        'requests_seconds_count{method="GET",route="/api/notes/{note_id}",status="422"} 1',
+        'requests_seconds_count{method="GET",route="unmatched",status="404"} 1',
+    ]
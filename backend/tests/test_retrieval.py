@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+import retrieval
+from retrieval import BM25Index, relevant_context_async, tokenize
+from summary_cache import MemoryLRU
+
+
+def test_tokenize_drops_stopwords_and_plural_s():
+    assert tokenize("What are the side effects of my medications?") == ["side", "effect", "medication"]
+
+
+def test_tokenize_spanish():
+    assert tokenize("¿Cuál es la dosis de metformina con las comidas?") == ["dosi", "metformina", "comida"]
+
+
+def test_tokenize_keeps_devanagari_words_whole():
+    assert tokenize("मरीज़ को सीने में दर्द है। दवाइयाँ क्या हैं?") == ["मरीज़", "सीने", "दर्द", "दवाइयाँ"]
+
+
+PASSAGES = [
+    ("History", "Admitted with chest pain. History of hypertension."),
+    ("Medications", "Aspirin 81 mg daily. Metoprolol 25 mg twice daily for blood pressure."),
+    ("Allergies", "Penicillin causes a rash."),
+    ("Follow-up", "Cardiology review in two weeks; repeat blood tests."),
+]
+
+
+def test_search_ranks_matching_passages_best_first():
+    index = BM25Index(PASSAGES)
+    assert index.search("Which medication lowers my blood pressure?") == [1, 3]
+    assert index.search("penicillin allergy", k=1) == [2]
+
+
+def test_search_returns_nothing_without_shared_terms():
+    assert BM25Index(PASSAGES).search("what about insulin?") == []
+
+
+def test_search_matches_hindi_passages():
+    index = BM25Index([("दवाइयाँ", "एस्पिरिन रोज़ एक बार"), ("जाँच", "दो हफ़्ते में दिल की जाँच")])
+    assert index.search("दिल की जाँच कब है?") == [1]
+
+
+def _note() -> str:
+    filler = "Vitals were stable and the patient was comfortable overnight. " * 40
+    return (
+        f"HISTORY:\n{filler}\n"
+        "ALLERGIES:\nPenicillin causes a rash.\n"
+        f"PROGRESS:\n{filler}\n"
+        "MEDICATIONS:\nMetoprolol 25 mg twice daily.\n"
+    )
+
+
+@pytest.fixture
+def inline_index(monkeypatch):
+    async def run_inline(fn, *args):
+        return fn(*args)
+
+    # Build indexes in the test process instead of on the extraction pool.
+    monkeypatch.setattr(retrieval, "run_extraction", run_inline)
+    monkeypatch.setattr(retrieval, "_indexes", MemoryLRU())
+
+
+def _context(note: str, question: str) -> str:
+    return asyncio.run(relevant_context_async(note, question))
+
+
+def test_relevant_context_sends_matching_passages_in_document_order(inline_index):
+    context = _context(_note(), "Is metoprolol safe with my penicillin allergy?")
+    assert context == "ALLERGIES:\nPenicillin causes a rash.\n\nMEDICATIONS:\nMetoprolol 25 mg twice daily."
+
+
+def test_relevant_context_keeps_short_or_unmatched_notes_whole(inline_index):
+    short = "MEDICATIONS:\nMetoprolol 25 mg twice daily."
+    assert _context(short, "What about insulin?") == short
+    assert _context(_note(), "What about insulin?") == _note()
@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+
+import search_client
+from search_client import RateLimited, SearchClient, SearchError, TokenBucket
+
+RESULTS = {"organic_results": [{"title": "Ibuprofen", "link": "https://example.org", "snippet": "Take with food."}]}
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve(max_wait=0) == 0
+    assert bucket.reserve(max_wait=0) == 0
+    assert bucket.reserve(max_wait=0) is None
+    assert bucket.reserve(max_wait=1) == pytest.approx(0.1, abs=0.02)
+    # The refused reservation took nothing; the accepted one took the next token.
+    assert bucket.reserve(max_wait=1) == pytest.approx(0.2, abs=0.02)
+
+
+def mock_http(monkeypatch, responses):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        status, body, headers = responses[min(len(requests), len(responses)) - 1]
+        return httpx.Response(status, json=body, headers=headers)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(search_client, "get_http_client", lambda: client)
+    return requests
+
+
+def make_client(**kwargs):
+    kwargs.setdefault("bucket", TokenBucket(rate=1000, burst=100))
+    return SearchClient(url="https://serpapi.test/search", api_key="key", backoff=0, **kwargs)
+
+
+def test_retries_server_errors(monkeypatch):
+    requests = mock_http(monkeypatch, [(503, {}, {}), (429, {}, {"Retry-After": "0"}), (200, RESULTS, {})])
+    client = make_client(retries=2)
+    assert "Take with food." in asyncio.run(client.search("ibuprofen"))
+    assert len(requests) == 3
+    assert client.stats()["retried"] == 2
+
+
+def test_gives_up_after_retries(monkeypatch):
+    requests = mock_http(monkeypatch, [(500, {}, {})])
+    client = make_client(retries=1)
+    with pytest.raises(SearchError):
+        asyncio.run(client.search("ibuprofen"))
+    assert len(requests) == 2
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    requests = mock_http(monkeypatch, [(401, {"error": "Invalid API key"}, {})])
+    client = make_client(retries=2)
+    with pytest.raises(SearchError):
+        asyncio.run(client.search("ibuprofen"))
+    assert len(requests) == 1
+
+
+def test_retry_after_is_capped_by_max_wait():
+    client = make_client(max_wait=1)
+    assert client._delay(0, "30") == 1
+
+
+def test_exhausted_quota_raises_rate_limited(monkeypatch):
+    requests = mock_http(monkeypatch, [(200, RESULTS, {})])
+    client = make_client(bucket=TokenBucket(rate=0.001, burst=1), max_wait=0)
+    asyncio.run(client.search("ibuprofen"))
+    with pytest.raises(RateLimited):
+        asyncio.run(client.search("paracetamol"))
+    assert len(requests) == 1
+
+
+def test_equivalent_queries_share_one_request(monkeypatch):
+    requests = mock_http(monkeypatch, [(200, RESULTS, {})])
+    client = make_client()
+
+    async def run():
+        return await asyncio.gather(
+            client.search("Can I take ibuprofen?"),
+            client.search("can i take  IBUPROFEN"),
+            client.search("can I take ibuprofen"),
+        )
+
+    assert len(set(asyncio.run(run()))) == 1
+    assert len(requests) == 1
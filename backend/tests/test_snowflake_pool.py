@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.stubs import FakeConnection
+from snowflake_pool import ConnectionPool, PoolClosed, PoolTimeout
+
+
+def make_pool(**kwargs):
+    connections = []
+
+    def connect():
+        conn = FakeConnection(delay=0)
+        connections.append(conn)
+        return conn
+
+    return ConnectionPool(connect=connect, **kwargs), connections
+
+
+def test_released_connection_is_reused():
+    pool, connections = make_pool()
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    assert len(connections) == 1
+    assert pool.stats()["hits"] == 1
+    assert pool.stats()["misses"] == 1
+
+
+def test_acquire_waits_for_a_release_when_full():
+    pool, connections = make_pool(max_size=1, acquire_timeout=5)
+    conn = pool.acquire()
+    releaser = threading.Timer(0.1, pool.release, (conn,))
+    releaser.start()
+    assert pool.acquire() is conn
+    releaser.join()
+    assert len(connections) == 1
+    assert pool.stats()["waits"] == 1
+
+
+def test_acquire_times_out_when_full():
+    pool, _ = make_pool(max_size=1, acquire_timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_idle_connections_are_evicted():
+    pool, connections = make_pool(idle_timeout=0.05)
+    old = pool.acquire()
+    pool.release(old)
+    time.sleep(0.1)
+    new = pool.acquire()
+    assert new is not old
+    assert old.is_closed()
+    assert pool.stats()["evictions"] == 1
+    assert pool.stats()["size"] == 1
+
+
+def test_closed_connection_is_discarded():
+    pool, connections = make_pool()
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+    assert pool.acquire() is not conn
+    assert pool.stats()["discarded"] == 1
+    assert pool.stats()["size"] == 1
+
+
+def test_failed_health_check_discards_connection():
+    pool, connections = make_pool(health_check_interval=0)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    def broken_cursor():
+        raise RuntimeError("connection reset")
+
+    conn.cursor = broken_cursor
+    assert pool.acquire() is not conn
+    assert pool.stats()["discarded"] == 1
+
+
+def test_close_with_connections_in_use():
+    pool, _ = make_pool()
+    idle, busy = pool.acquire(), pool.acquire()
+    pool.release(idle)
+    pool.close()
+    assert idle.is_closed()
+    assert not busy.is_closed()
+    with pytest.raises(PoolClosed):
+        pool.acquire()
+    pool.release(busy)
+    assert busy.is_closed()
+    assert pool.stats()["size"] == 0
@@ -0,0 +1,39 @@
+import pytest
+
+from summarizer import BoldStripper, clean_summary
+
+SUMMARIES = [
+    "**Diagnosis:** seasonal allergies.\n**Medications:** cetirizine 10 mg daily.",
+    "Take **one** tablet **twice** daily.\nAvoid * wildcards * and 2*3 math.",
+    "An **unclosed marker\nstays as written.",
+    "Trailing star *",
+    "***Bold with an extra star*** and ****empty pairs****.",
+]
+
+
+def _stream(text: str, sizes) -> str:
+    stripper, out, i = BoldStripper(), [], 0
+    for size in sizes:
+        out.append(stripper.feed(text[i:i + size]))
+        i += size
+    out.append(stripper.feed(text[i:]))
+    return "".join(out) + stripper.flush()
+
+
+@pytest.mark.parametrize("text", SUMMARIES)
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8])
+def test_streamed_output_matches_clean_summary(text, size):
+    assert _stream(text, [size] * (len(text) // size)) == clean_summary(text)
+
+
+def test_markers_split_across_chunks():
+    assert _stream("Take **aspirin** daily.", [6, 1, 8, 1]) == "Take aspirin daily."
+
+
+def test_text_is_released_once_no_marker_can_change_it():
+    stripper = BoldStripper()
+    assert stripper.feed("Take ") == "Take "
+    assert stripper.feed("**aspi") == ""
+    assert stripper.feed("rin** daily*") == "aspirin daily"
+    assert stripper.feed("\nNext") == "*\nNext"
+    assert stripper.flush() == ""
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from summary_cache import SummaryCache
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = SummaryCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "summary"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["summary"] * 5
+    assert calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    cache = SummaryCache()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "summary"
+
+    async def run():
+        leader = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(run()) == ("summary", True)
+    assert cache.memory.get("k") == "summary"
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    cache = SummaryCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("cortex down")
+
+    async def run():
+        return await asyncio.gather(
+            cache.get_or_compute("k", fail), cache.get_or_compute("k", fail),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache.memory.get("k") is None
+    assert not cache._inflight
+
+
+def test_uncacheable_result_is_returned_but_not_stored():
+    cache = SummaryCache()
+
+    async def compute():
+        return "error"
+
+    value = asyncio.run(cache.get_or_compute("k", compute, cacheable=lambda v: v != "error"))
+    assert value == "error"
+    assert cache.memory.get("k") is None
+    assert cache.stats()["rejected"] == 1
+
+
+def test_lookup_waits_for_a_claimed_computation():
+    cache = SummaryCache()
+
+    async def run():
+        assert await cache.lookup("k") is None
+        claim = cache.claim("k")
+        waiter = asyncio.ensure_future(cache.lookup("k"))
+        await asyncio.sleep(0.01)
+        cache.release("k", claim, "streamed summary")
+        return await waiter
+
+    assert asyncio.run(run()) == "streamed summary"
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 1
+
+
+@pytest.mark.parametrize("waiter", ["lookup", "get_or_compute"])
+def test_abandoned_claim_lets_waiters_compute(waiter):
+    cache = SummaryCache()
+
+    async def compute():
+        return "computed"
+
+    async def run():
+        claim = cache.claim("k")
+        if waiter == "lookup":
+            pending = asyncio.ensure_future(cache.lookup("k"))
+        else:
+            pending = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        cache.release("k", claim, None)
+        return await pending
+
+    expected = None if waiter == "lookup" else "computed"
+    assert asyncio.run(run()) == expected
+    assert cache.stats()["coalesced"] == 0
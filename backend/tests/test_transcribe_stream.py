@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import voice_api
+from benchmarks.stubs import FakeTranscriber
+from transcription import TranscriberUnavailable, set_transcriber_factory
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(voice_api.router)
+    set_transcriber_factory(lambda language: FakeTranscriber(language))
+    yield TestClient(app)
+    set_transcriber_factory(None)
+
+
+def test_streams_partials_and_finals(client):
+    with client.websocket_connect("/api/transcribe-stream?language=en") as ws:
+        for chunk in (b"I have a ", b"headache. Since ", b"Monday"):
+            ws.send_bytes(chunk)
+        ws.send_text(json.dumps({"type": "stop"}))
+        events = []
+        while not events or events[-1]["type"] not in ("done", "error"):
+            events.append(ws.receive_json())
+
+    assert {"type": "partial", "text": "I have a"} in events
+    assert {"type": "final", "text": "I have a headache."} in events
+    assert events[-1] == {"type": "done", "transcript": "I have a headache. Since Monday"}
+
+
+def test_unavailable_backend_is_reported(client):
+    def unavailable(language):
+        raise TranscriberUnavailable("Deepgram API key not set.")
+
+    set_transcriber_factory(unavailable)
+    with client.websocket_connect("/api/transcribe-stream") as ws:
+        assert ws.receive_json() == {"type": "error", "detail": "Deepgram API key not set."}
+
+
+def test_oversized_recording_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(voice_api, "TRANSCRIBE_MAX_BYTES", 10)
+    with client.websocket_connect("/api/transcribe-stream") as ws:
+        ws.send_bytes(b"far more than ten bytes of audio")
+        message = ws.receive_json()
+    assert message["type"] == "error"
+    assert "limit" in message["detail"]
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+import warmup
+from warmup import Warmup
+
+
+def test_failed_step_is_retried_until_ready(monkeypatch):
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("snowflake unavailable")
+
+    monkeypatch.setitem(warmup.WARMUP_STEPS, "flaky", flaky)
+
+    async def run():
+        w = Warmup(["flaky"], retry_seconds=0.01, retry_max_seconds=0.02)
+        w.start()
+        await asyncio.sleep(0)
+        assert not w.ready
+        await asyncio.wait_for(w._task, timeout=2)
+        return w.status()
+
+    status = asyncio.run(run())
+    assert status["ready"]
+    assert status["attempts"] == {"flaky": 3}
+
+
+def test_unknown_step_is_rejected():
+    with pytest.raises(ValueError):
+        Warmup(["parsers", "caches"])
@@ -0,0 +1,112 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+from urllib.parse import urlencode
+
+DEEPGRAM_STREAM_URL = os.getenv("DEEPGRAM_STREAM_URL", "wss://api.deepgram.com/v1/listen")
+
+
+class TranscriberUnavailable(Exception):
+    """No streaming transcription backend could be opened."""
+
+
+class StreamingTranscriber(ABC):
+    """
+    Interface for live speech-to-text backends. The caller start()s the
+    transcriber, send()s audio chunks in order, then finish()es the stream,
+    while reading events() concurrently. Each event is a dict with "type"
+    ("partial" or "final") and "text"; a partial is replaced by the next
+    partial or final of the same utterance. events() ends once every final
+    for the finished stream has been delivered.
+    """
+
+    async def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def send(self, chunk: bytes) -> None:
+        """Queue one chunk of audio, waiting while the backend is behind."""
+
+    @abstractmethod
+    async def finish(self) -> None:
+        """Signal that no more audio will be sent."""
+
+    @abstractmethod
+    def events(self) -> AsyncIterator[dict]:
+        """Async iterator of transcript events; implement as an async generator."""
+
+    async def close(self) -> None:
+        pass
+
+
+class DeepgramTranscriber(StreamingTranscriber):
+    """
+    Deepgram live transcription over its WebSocket API, with interim results.
+    """
+
+    def __init__(self, api_key: str, language: str = "en", url: str = DEEPGRAM_STREAM_URL):
+        self.api_key = api_key
+        self.language = language
+        self.url = url
+        self._ws = None
+
+    async def start(self) -> None:
+        import websockets
+
+        query = urlencode({
+            "language": self.language,
+            "interim_results": "true",
+            "punctuate": "true",
+        })
+        try:
+            self._ws = await websockets.connect(
+                f"{self.url}?{query}",
+                additional_headers={"Authorization": f"Token {self.api_key}"},
+            )
+        except Exception as e:
+            raise TranscriberUnavailable(f"Could not connect to Deepgram: {e}") from e
+
+    async def send(self, chunk: bytes) -> None:
+        # Waits while the socket's write buffer is full, passing backpressure upstream.
+        await self._ws.send(chunk)
+
+    async def finish(self) -> None:
+        await self._ws.send(json.dumps({"type": "CloseStream"}))
+
+    async def events(self):
+        async for message in self._ws:
+            data = json.loads(message)
+            if data.get("type") != "Results":
+                continue
+            text = data.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
+            if text:
+                yield {"type": "final" if data.get("is_final") else "partial", "text": text}
+
+    async def close(self) -> None:
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+
+
+def _deepgram(language: str) -> StreamingTranscriber:
+    api_key = os.getenv("DEEPGRAM_API_KEY")
+    if not api_key:
+        raise TranscriberUnavailable("Deepgram API key not set.")
+    return DeepgramTranscriber(api_key, language)
+
+
+_factory = None
+
+
+def set_transcriber_factory(factory=None) -> None:
+    """
+    Choose the backend for live transcription: `factory(language)` returns a
+    new StreamingTranscriber. None restores the Deepgram default.
+    """
+    global _factory
+    _factory = factory
+
+
+def create_transcriber(language: str = "en") -> StreamingTranscriber:
+    return (_factory or _deepgram)(language)
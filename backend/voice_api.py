@@ -1,11 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import requests
+from fastapi import APIRouter, UploadFile, File, HTTPException, WebSocket
+import asyncio
+import json
 import os
-from dotenv import load_dotenv
+import time
+from concurrency import deepgram_limit, env_int, transcribe_stream_limit
+from http_client import get_http_client
+from metrics import observe_stage, span, transcriptions
+from transcription import TranscriberUnavailable, create_transcriber
 
-load_dotenv()
+DEEPGRAM_URL = os.getenv("DEEPGRAM_URL", "https://api.deepgram.com/v1/listen")
+# Audio chunks held between the browser and the transcriber. When it is full
+# the socket stops being read, so a slow backend slows the sender down.
+TRANSCRIBE_QUEUE_CHUNKS = env_int("TRANSCRIBE_QUEUE_CHUNKS", 32)
+TRANSCRIBE_MAX_BYTES = env_int("TRANSCRIBE_MAX_MB", 25) * 1024 * 1024
 router = APIRouter()
 
+class RecordingTooLarge(Exception):
+    """A live recording went over TRANSCRIBE_MAX_MB."""
+
+class _ClientGone(Exception):
+    pass
+
 @router.post("/api/transcribe-audio")
 async def transcribe_audio(audio: UploadFile = File(...), language: str = "en"):
     api_key = os.getenv("DEEPGRAM_API_KEY")
@@ -17,17 +32,28 @@ async def transcribe_audio(audio: UploadFile = File(...), language: str = "en"):
         "Content-Type": audio.content_type,
     }
 
-    audio_bytes = await audio.read()
+    with span("upload"):
+        audio_bytes = await audio.read()
 
-    response = requests.post(
-        f"https://api.deepgram.com/v1/listen?language={language}",
-        headers=headers,
-        data=audio_bytes
-    )
+    try:
+        async with deepgram_limit:
+            with span("deepgram.transcribe"):
+                response = await get_http_client().post(
+                    DEEPGRAM_URL,
+                    params={"language": language},
+                    headers=headers,
+                    content=audio_bytes
+                )
+    except Exception as e:
+        print(f"Deepgram request failed: {e}")
+        transcriptions.inc(mode="upload", outcome="error")
+        raise HTTPException(status_code=500, detail="Transcription failed.")
 
     if response.status_code != 200:
         print(response.text)
+        transcriptions.inc(mode="upload", outcome="error")
         raise HTTPException(status_code=500, detail="Transcription failed.")
+    transcriptions.inc(mode="upload", outcome="ok")
 
     transcript = (
         response.json()
@@ -38,3 +64,99 @@ async def transcribe_audio(audio: UploadFile = File(...), language: str = "en"):
     )
 
     return {"transcript": transcript}
+
+@router.websocket("/api/transcribe-stream")
+async def transcribe_stream(websocket: WebSocket, language: str = "en"):
+    """
+    Live transcription. The client sends audio as binary frames and
+    {"type": "stop"} when done; the server sends {"type": "partial"|"final",
+    "text"} as speech is recognized, then {"type": "done", "transcript"} with
+    every final joined, and closes.
+    """
+    await websocket.accept()
+    try:
+        async with transcribe_stream_limit:
+            transcriber = create_transcriber(language)
+            try:
+                with span("transcribe.connect"):
+                    await transcriber.start()
+                with span("transcribe.session"):
+                    transcript = await _run_transcription(websocket, transcriber)
+            finally:
+                await transcriber.close()
+    except _ClientGone:
+        transcriptions.inc(mode="live", outcome="disconnected")
+        return
+    except (TranscriberUnavailable, RecordingTooLarge) as e:
+        print(f"Live transcription stopped: {e}")
+        transcriptions.inc(mode="live", outcome="rejected")
+        await _close_with_error(websocket, str(e))
+        return
+    except Exception as e:
+        print(f"Live transcription failed: {e}")
+        transcriptions.inc(mode="live", outcome="error")
+        await _close_with_error(websocket, "Transcription failed.")
+        return
+
+    transcriptions.inc(mode="live", outcome="ok")
+
+    await websocket.send_json({"type": "done", "transcript": transcript})
+    await websocket.close()
+
+async def _close_with_error(websocket: WebSocket, detail: str):
+    try:
+        await websocket.send_json({"type": "error", "detail": detail})
+        await websocket.close(code=1011)
+    except Exception:
+        pass
+
+def _is_stop(text: str) -> bool:
+    try:
+        return json.loads(text).get("type") == "stop"
+    except (ValueError, AttributeError):
+        return False
+
+async def _run_transcription(websocket: WebSocket, transcriber) -> str:
+    queue = asyncio.Queue(maxsize=TRANSCRIBE_QUEUE_CHUNKS)
+    finals = []
+    start = time.perf_counter()
+
+    async def receive_audio():
+        received = 0
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise _ClientGone()
+            if message.get("bytes"):
+                received += len(message["bytes"])
+                if received > TRANSCRIBE_MAX_BYTES:
+                    raise RecordingTooLarge(
+                        f"Recording exceeds the {TRANSCRIBE_MAX_BYTES // (1024 * 1024)} MB limit"
+                    )
+                await queue.put(message["bytes"])
+            elif message.get("text") and _is_stop(message["text"]):
+                break
+        await queue.put(None)
+
+    async def forward_audio():
+        while (chunk := await queue.get()) is not None:
+            await transcriber.send(chunk)
+        await transcriber.finish()
+
+    async def send_transcripts():
+        first = True
+        async for event in transcriber.events():
+            if first:
+                observe_stage("transcribe.first_text", time.perf_counter() - start)
+                first = False
+            if event["type"] == "final":
+                finals.append(event["text"])
+            await websocket.send_json(event)
+
+    tasks = [asyncio.ensure_future(t()) for t in (receive_audio, forward_audio, send_transcripts)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return " ".join(finals)
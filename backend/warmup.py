@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+
+from concurrency import env_int, extract_limit, run_extraction, run_snowflake
+from extractor import preload_parsers
+from snowflake_pool import get_pool
+
+# Steps run after startup, before the worker reports ready. "none" skips warm-up.
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "parsers,snowflake")
+WARMUP_CONNECTIONS = env_int("SNOWFLAKE_WARMUP_CONNECTIONS", 1)
+# A failed step is retried after this many seconds, doubling up to the maximum.
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "1"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "30"))
+
+
+async def _warm_parsers() -> None:
+    # Off the event loop, so the worker keeps answering while fitz loads.
+    await asyncio.to_thread(preload_parsers)
+    # Worker processes import the parsers in their initializer; one task per
+    # worker makes the pool start them now rather than on the first upload.
+    await asyncio.gather(*(run_extraction(preload_parsers) for _ in range(extract_limit.limit)))
+
+
+async def _warm_snowflake() -> None:
+    pool = get_pool()
+    count = min(WARMUP_CONNECTIONS, pool.max_size)
+    # Hold them all at once so each acquire opens a new connection.
+    results = await asyncio.gather(
+        *(run_snowflake(pool.acquire) for _ in range(count)), return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    for conn in results:
+        if not isinstance(conn, BaseException):
+            pool.release(conn)
+    if errors:
+        raise errors[0]
+
+
+WARMUP_STEPS = {
+    "parsers": _warm_parsers,
+    "snowflake": _warm_snowflake,
+}
+
+
+class Warmup:
+    """
+    Runs the configured warm-up steps in the background and tracks whether
+    the worker is ready to take traffic. Failed steps are retried with
+    backoff until they succeed, so a dependency that is down at boot delays
+    readiness instead of keeping the worker unready for good.
+    """
+
+    def __init__(self, steps, retry_seconds: float = WARMUP_RETRY_SECONDS,
+                 retry_max_seconds: float = WARMUP_RETRY_MAX_SECONDS):
+        unknown = [step for step in steps if step not in WARMUP_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown warm-up steps: {', '.join(unknown)}")
+        self.steps = {step: "pending" for step in steps}
+        self.attempts = {step: 0 for step in steps}
+        self.retry_seconds = retry_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.seconds = None
+        self._task = None
+
+    @classmethod
+    def from_env(cls) -> "Warmup":
+        value = STARTUP_WARMUP.strip().lower()
+        steps = [] if value in ("", "none") else [s.strip() for s in value.split(",") if s.strip()]
+        return cls(steps)
+
+    @property
+    def ready(self) -> bool:
+        return all(status == "ok" for status in self.steps.values())
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        start = time.perf_counter()
+
+        async def run(step):
+            delay = self.retry_seconds
+            while True:
+                self.attempts[step] += 1
+                try:
+                    await WARMUP_STEPS[step]()
+                    self.steps[step] = "ok"
+                    return
+                except Exception as e:
+                    print(f"Warm-up step {step} failed (attempt {self.attempts[step]}), retrying in {delay:g}s: {e}")
+                    self.steps[step] = f"error: {e}"
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max_seconds)
+
+        await asyncio.gather(*(run(step) for step in self.steps))
+        self.seconds = time.perf_counter() - start
+        if self.steps:
+            print(f"Warm-up finished in {self.seconds:.2f}s: {self.steps}")
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup": dict(self.steps),
+            "attempts": dict(self.attempts),
+            "seconds": self.seconds,
+        }
+
+
+_warmup = None
+
+
+def start_warmup(warmup: Warmup = None) -> Warmup:
+    global _warmup
+    _warmup = warmup if warmup is not None else Warmup.from_env()
+    _warmup.start()
+    return _warmup
+
+
+def get_warmup() -> Warmup:
+    global _warmup
+    if _warmup is None:
+        # Not started from a lifespan (e.g. a bare import): nothing to wait for.
+        _warmup = Warmup([])
+    return _warmup
+
+
+async def stop_warmup() -> None:
+    global _warmup
+    if _warmup is not None:
+        await _warmup.stop()
+        _warmup = None
@@ -2,6 +2,7 @@ import { useState } from "react";
 import VoiceRecorder from "./VoiceRecorder";
 import { extractFollowUps } from "../utils/extractFollowUps";
 import { generateCalendarLink } from "../utils/generateCalendarLink";
+import { readEventStream } from "../utils/readEventStream";
 
 export default function SummaryForm() {
   const [mode, setMode] = useState("text");
@@ -25,14 +26,17 @@ export default function SummaryForm() {
     setChatHistory([]);
 
     try {
-      const res = await fetch("/api/summarize-text", {
+      const res = await fetch("/api/summarize-text/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ note, lang }),
       });
       if (!res.ok) throw new Error(await res.text());
-      const data = await res.json();
-      setSummary(data.summary);
+      // Show the summary as it is generated instead of waiting for all of it
+      await readEventStream(res, (event, data) => {
+        if (event === "token") setSummary((prev) => prev + data.text);
+        else if (event === "error") setSummary(data.text);
+      });
       setReminders(extractFollowUps(note, lang)); // extract from original input
     } catch (err) {
       setError(err.message || "Unknown error");
@@ -77,18 +81,25 @@ export default function SummaryForm() {
     setQuestion("");
 
     try {
-      const res = await fetch("/api/ask", {
+      const res = await fetch("/api/ask/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ note: summary, question }),
       });
-      const data = await res.json();
+      if (!res.ok) throw new Error(await res.text());
 
-      setChatHistory((prev) =>
-        prev.map((chat, i) =>
-          i === prev.length - 1 ? { ...chat, a: data.answer } : chat
-        )
-      );
+      let answer = "";
+      await readEventStream(res, (event, data) => {
+        // "replace" carries the web search fallback for a vague answer
+        if (event === "token") answer += data.text;
+        else if (event === "replace") answer = data.text;
+        else return;
+        setChatHistory((prev) =>
+          prev.map((chat, i) =>
+            i === prev.length - 1 ? { ...chat, a: answer } : chat
+          )
+        );
+      });
     } catch (err) {
       setChatHistory((prev) =>
         prev.map((chat, i) =>
@@ -1,42 +1,127 @@
 import { useState, useRef } from "react";
 
+// Stop sending audio into the socket while this much is still unsent,
+// so a slow connection does not pile up the whole recording in memory.
+const MAX_BUFFERED_BYTES = 1024 * 1024;
+
 export default function VoiceRecorder({ onTranscript }) {
   const [recording, setRecording] = useState(false);
   const [language, setLanguage] = useState("en");
+  const [finalText, setFinalText] = useState("");
+  const [partialText, setPartialText] = useState("");
   const mediaRecorderRef = useRef(null);
+  const socketRef = useRef(null);
   const audioChunks = useRef([]);
+  const pendingChunks = useRef([]);
+  const stopSent = useRef(false);
+
+  const uploadRecording = async () => {
+    const audioBlob = new Blob(audioChunks.current, { type: "audio/webm" });
+    const formData = new FormData();
+    formData.append("audio", audioBlob);
+
+    try {
+      const res = await fetch(`/api/transcribe-audio?language=${language}`, {
+        method: "POST",
+        body: formData
+      });
+      const data = await res.json();
+      if (data.transcript) onTranscript(data.transcript);
+      else console.error("No transcript returned", data);
+    } catch (err) {
+      console.error("Transcription error:", err);
+    }
+  };
+
+  const openSocket = () => {
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+    const socket = new WebSocket(
+      `${protocol}://${window.location.host}/api/transcribe-stream?language=${language}`
+    );
+    socket.binaryType = "arraybuffer";
+    let finals = "";
+
+    socket.onmessage = event => {
+      const message = JSON.parse(event.data);
+      if (message.type === "partial") {
+        setPartialText(message.text);
+      } else if (message.type === "final") {
+        finals = finals ? `${finals} ${message.text}` : message.text;
+        setFinalText(finals);
+        setPartialText("");
+      } else if (message.type === "done") {
+        if (message.transcript) onTranscript(message.transcript);
+        else console.error("No transcript returned", message);
+      } else if (message.type === "error") {
+        console.error("Live transcription error:", message.detail);
+      }
+    };
+    return socket;
+  };
+
+  const flushPending = () => {
+    const socket = socketRef.current;
+    while (
+      pendingChunks.current.length &&
+      socket?.readyState === WebSocket.OPEN &&
+      socket.bufferedAmount < MAX_BUFFERED_BYTES
+    ) {
+      socket.send(pendingChunks.current.shift());
+    }
+    if (pendingChunks.current.length && socket?.readyState === WebSocket.OPEN) {
+      setTimeout(flushPending, 100);
+    } else if (
+      !pendingChunks.current.length &&
+      mediaRecorderRef.current?.state === "inactive" &&
+      socket?.readyState === WebSocket.OPEN &&
+      !stopSent.current
+    ) {
+      stopSent.current = true;
+      socket.send(JSON.stringify({ type: "stop" }));
+    }
+  };
 
   const startRecording = async () => {
     const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
     const mediaRecorder = new MediaRecorder(stream);
     mediaRecorderRef.current = mediaRecorder;
     audioChunks.current = [];
+    pendingChunks.current = [];
+    stopSent.current = false;
+    setFinalText("");
+    setPartialText("");
+
+    const socket = openSocket();
+    socketRef.current = socket;
+    let live = true;
+    socket.onopen = flushPending;
+    socket.onerror = () => {
+      // Fall back to uploading the whole recording when streaming is unavailable.
+      live = false;
+    };
 
     mediaRecorder.ondataavailable = event => {
       if (event.data.size > 0) {
         audioChunks.current.push(event.data);
+        if (live) {
+          pendingChunks.current.push(event.data);
+          flushPending();
+        }
       }
     };
 
     mediaRecorder.onstop = async () => {
-      const audioBlob = new Blob(audioChunks.current, { type: "audio/webm" });
-      const formData = new FormData();
-      formData.append("audio", audioBlob);
-
-      try {
-        const res = await fetch(`/api/transcribe-audio?language=${language}`, {
-          method: "POST",
-          body: formData
-        });
-        const data = await res.json();
-        if (data.transcript) onTranscript(data.transcript);
-        else console.error("No transcript returned", data);
-      } catch (err) {
-        console.error("Transcription error:", err);
+      stream.getTracks().forEach(track => track.stop());
+      if (live && socket.readyState === WebSocket.OPEN) {
+        flushPending();
+      } else {
+        socket.close();
+        await uploadRecording();
       }
     };
 
-    mediaRecorder.start();
+    // Emit audio every 250ms so it can be transcribed while the user speaks.
+    mediaRecorder.start(250);
     setRecording(true);
   };
 
@@ -79,6 +164,12 @@ export default function VoiceRecorder({ onTranscript }) {
       >
         {recording ? "Stop Recording" : "🎤 Record Question"}
       </button>
+
+      {(finalText || partialText) && (
+        <p style={{ marginTop: 8 }}>
+          {finalText} <span style={{ color: "#6c757d" }}>{partialText}</span>
+        </p>
+      )}
     </div>
   );
 }